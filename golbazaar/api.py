@@ -1,7 +1,21 @@
+import json
+from datetime import datetime
+
 import frappe
 
+from erpnext.accounts.doctype.pos_invoice.pos_invoice import get_stock_availability
+from erpnext.selling.page.point_of_sale.point_of_sale import (
+	search_by_term,
+	filter_result_items,
+	get_conditions,
+	get_item_group_condition,
+)
+from erpnext.stock.doctype.item.item import get_uom_conv_factor
 from frappe import _
-from frappe.utils.password import check_password, get_decrypted_password
+from frappe.rate_limiter import rate_limit
+from frappe.utils import cint, flt, random_string
+from frappe.utils.caching import redis_cache, request_cache
+from frappe.utils.password import check_password, get_decrypted_password, set_encrypted_password
 
 
 @frappe.whitelist(allow_guest=True)
@@ -70,34 +84,34 @@ def login_device(user_name, password, device_id):
 def get_api_keys(user=None):
 	"""Return (and if needed, generate) API key/secret for given user (or current)."""
 	user_name = user or frappe.session.user
-	user_doc = frappe.get_doc("User", user_name)
-	changed = False
+	# Read/write only the two columns instead of loading and saving the whole User doc
+	api_key = frappe.db.get_value("User", user_name, "api_key")
+	if not api_key and not frappe.db.exists("User", user_name):
+		frappe.throw(_("User {0} not found").format(user_name), frappe.DoesNotExistError)
 	
 	# Ensure API Key exists
-	if not user_doc.api_key:
-		user_doc.api_key = frappe.generate_hash(length=15)
-		changed = True
+	if not api_key:
+		api_key = frappe.generate_hash(length=15)
+		frappe.db.set_value("User", user_name, "api_key", api_key, update_modified=False)
 	
 	# Try to read existing secret (returns decrypted value if set)
 	api_secret_value = None
 	try:
-		api_secret_value = get_decrypted_password("User", user_doc.name, "api_secret", raise_exception=False)
+		api_secret_value = get_decrypted_password("User", user_name, "api_secret", raise_exception=False)
 	except Exception:
 		api_secret_value = None
 	
-	# Generate secret only if missing
+	# Generate secret only if missing; stored encrypted like a Password field save would
 	if not api_secret_value:
 		api_secret_value = frappe.generate_hash(length=32)
-		user_doc.api_secret = api_secret_value
-		changed = True
-	
-	if changed:
-		user_doc.save(ignore_permissions=True)
+		set_encrypted_password("User", user_name, api_secret_value, "api_secret")
+		frappe.db.set_value("User", user_name, "api_secret", "*" * len(api_secret_value), update_modified=False)
 	
-	return {"api_key": user_doc.api_key, "api_secret": api_secret_value}
+	return {"api_key": api_key, "api_secret": api_secret_value}
 
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(limit=10, seconds=60)
 def check_email(email):
 	"""
 	Check if an email address is available for registration
@@ -109,8 +123,8 @@ def check_email(email):
 	- {"message": {"not_available": true/false}}
 	"""
 	try:
-		# Check if user exists
-		exists = frappe.db.exists("User", email)
+		# Check if user exists (SELECT 1: nothing about the user is loaded or cached)
+		exists = frappe.db.sql("SELECT 1 FROM `tabUser` WHERE name = %s LIMIT 1", email)
 		
 		return {"message": {"not_available": bool(exists)}}
 		
@@ -132,34 +146,28 @@ def lost_password(email):
 	"""
 	try:
 		# Check if user exists
-		if not frappe.db.exists("User", email):
+		if not frappe.get_cached_value("User", email, "name"):
 			return {"message": {"sent": False, "error": "Email not found"}}
 		
-		# Generate password reset key
-		user = frappe.get_doc("User", email)
-		
 		# Generate reset password key
-		from frappe.utils import random_string
 		reset_key = random_string(15)
 		
-		user.reset_password_key = reset_key
-		user.last_reset_password_key_generated_on = frappe.utils.now()
-		user.save(ignore_permissions=True)
+		# Write the two columns directly instead of saving the User doc (skips User hooks)
+		frappe.db.set_value(
+			"User",
+			email,
+			{"reset_password_key": reset_key, "last_reset_password_key_generated_on": frappe.utils.now()},
+			update_modified=False,
+		)
 		
-		# Send reset email
+		# Send reset email from a background job so the response doesn't wait on SMTP
 		reset_link = f"{frappe.utils.get_url()}/reset-password?key={reset_key}"
-		
-		# Send email
-		frappe.sendmail(
-			recipients=[email],
-			subject="Reset Your Password - TailPOS",
-			message=f"""
-			<p>You have requested to reset your password.</p>
-			<p><a href="{reset_link}">Click here to reset your password</a></p>
-			<p>Or copy this link: {reset_link}</p>
-			<p>This link will expire in 24 hours.</p>
-			""",
-			now=True
+		frappe.enqueue(
+			"golbazaar.api.send_reset_password_email",
+			queue="short",
+			enqueue_after_commit=True,
+			email=email,
+			reset_link=reset_link,
 		)
 		
 		return {"message": {"sent": True, "message": "Password reset email sent"}}
@@ -169,37 +177,109 @@ def lost_password(email):
 		return {"message": {"sent": False, "error": str(e)}}
 
 
+def send_reset_password_email(email, reset_link):
+	"""Background job: send the password reset link generated by lost_password."""
+	frappe.sendmail(
+		recipients=[email],
+		subject="Reset Your Password - TailPOS",
+		message=f"""
+		<p>You have requested to reset your password.</p>
+		<p><a href="{reset_link}">Click here to reset your password</a></p>
+		<p>Or copy this link: {reset_link}</p>
+		<p>This link will expire in 24 hours.</p>
+		""",
+		now=True
+	)
+
+
+@request_cache
+def _get_global_uom_conv_factor(uom, stock_uom):
+	"""UOM Conversion Factor table lookup, once per UOM pair per request."""
+	return get_uom_conv_factor(uom, stock_uom)
+
+
+def _resolve_item_uom(item, item_prices, conv):
+	"""
+	Pick the selling UOM and matching Item Price row for an item returned by get_items.
+
+	Prefers the sales UOM, then the stock UOM, then the first available price.
+	Returns (uom, price_list_rate, currency, batch_no, conversion_factor); the factor
+	is None when the selling UOM is the stock UOM and no conversion applies.
+	"""
+	item_uom = item.stock_uom
+	item_uom_price = next((d for d in item_prices if d.uom == item.stock_uom), None)
+	
+	# Check for sales UOM
+	if item.sales_uom and item.sales_uom != item.stock_uom:
+		item_uom = item.sales_uom
+		item_uom_price = next((d for d in item_prices if d.uom == item.sales_uom), None) or item_uom_price
+	
+	# If no specific UOM price found, use first available
+	if item_prices and not item_uom_price:
+		item_uom = item_prices[0].uom
+		item_uom_price = item_prices[0]
+	
+	factor = None
+	if item_uom != item.stock_uom:
+		# Falls back to the template's factor for variants, then (like get_conversion_factor)
+		# to the global UOM Conversion Factor table for standard UOM pairs, then 1
+		factor = (
+			conv.get(item.item_code, {}).get(item_uom)
+			or conv.get(item.variant_of, {}).get(item_uom)
+			or _get_global_uom_conv_factor(item_uom, item.stock_uom)
+			or 1
+		)
+	
+	if not item_uom_price:
+		return item_uom, 0, "", None, factor
+	
+	rate = item_uom_price.price_list_rate
+	# Price is stored per stock UOM: scale it to the selling UOM
+	if item_uom != item_uom_price.uom:
+		rate = rate * (factor or 1)
+	return item_uom, rate, item_uom_price.currency, item_uom_price.batch_no, factor
+
+
+def get_pos_profile_stock_settings(pos_profile):
+	"""Return (warehouse, hide_unavailable_items) for a POS Profile, cached in Redis."""
+	if not pos_profile:
+		return None, 0
+	return frappe.cache().hget(
+		"golbazaar_pos_profile_stock_settings",
+		pos_profile,
+		generator=lambda: tuple(
+			frappe.db.get_value("POS Profile", pos_profile, ["warehouse", "hide_unavailable_items"]) or (None, 0)
+		),
+	)
+
+
+def clear_pos_profile_cache(doc, method=None):
+	"""doc_events hook: drop cached POS Profile settings when a profile changes."""
+	frappe.cache().hdel("golbazaar_pos_profile_stock_settings", doc.name)
+
+
 @frappe.whitelist(allow_guest=True)
-def get_items(start=0, page_length=50, pos_profile=None, item_group=None, price_list="Standard Selling", search_term="", last_updated_time=None):
+def get_items(start=0, page_length=50, pos_profile=None, item_group=None, price_list="Standard Selling", search_term="", last_updated_time=None, after_modified=None, after_name=None, include_total=0):
 	"""
 	Get items for POS
 	Based on ERPNext's get_items implementation
 	
 	Parameters:
-	- start: Pagination offset
+	- start: Pagination offset (ignored when a cursor is passed)
 	- page_length: Number of items per page
 	- pos_profile: POS Profile name (optional)
 	- item_group: Item Group name (optional)
 	- price_list: Price List name (optional, default: "Standard Selling")
 	- search_term: Search term for filtering items (optional)
 	- last_updated_time: Only fetch items modified after this time (format: "YYYY-MM-DD HH:MM:SS")
+	- after_modified, after_name: Keyset cursor, pass back "next_cursor" of the previous page
+	- include_total: Set to 1 to also compute "total" (runs an extra COUNT query)
 	
 	Returns:
-	- {"items": [...], "total": 100, "limit": 50, "offset": 0, "has_more": true, "next_offset": 50}
+	- {"items": [...], "total": null, "limit": 50, "offset": 0, "has_more": true, "next_offset": 50,
+	   "next_cursor": {"modified": "...", "name": "..."}, "sync_cursor": "YYYY-MM-DD HH:MM:SS"}
 	"""
 	try:
-		from frappe.utils import cint
-		from datetime import datetime
-		from erpnext.selling.page.point_of_sale.point_of_sale import (
-			search_by_term,
-			filter_result_items,
-			get_conditions,
-			get_item_group_condition,
-			get_stock_availability,
-			get_root_of,
-			get_conversion_factor
-		)
-		
 		# Convert to integers
 		start = cint(start)
 		page_length = cint(page_length)
@@ -240,35 +320,23 @@ def get_items(start=0, page_length=50, pos_profile=None, item_group=None, price_
 			if not price_list:
 				return {"message": {"error": "price_list is required when using search_term"}}
 			
-			warehouse = frappe.db.get_value("POS Profile", pos_profile, "warehouse")
+			warehouse, _hide_unavailable = get_pos_profile_stock_settings(pos_profile)
 			result = search_by_term(search_term, warehouse, price_list) or []
 			filter_result_items(result, pos_profile)
 			if result:
 				return {"items": result}
 		
-		# Handle item group
-		if item_group:
-			if not frappe.db.exists("Item Group", item_group):
-				item_group = get_root_of("Item Group")
-		
 		# Build conditions
 		condition = get_conditions(search_term)
 		condition += get_item_group_condition(pos_profile)
 		
-		# Get item group boundaries
-		if item_group:
-			lft, rgt = frappe.db.get_value("Item Group", item_group, ["lft", "rgt"])
-		else:
-			lft, rgt = 0, 999999
+		# Get item group boundaries (unknown groups fall back to the root group, i.e. no filter).
+		# Read from the DB, not the document cache: nestedset shifts lft/rgt of other groups with
+		# raw SQL that does not invalidate their cached docs.
+		item_group_bounds = frappe.db.get_value("Item Group", item_group, ["lft", "rgt"]) if item_group else None
 		
 		# Get warehouse and hide_unavailable_items from POS Profile
-		hide_unavailable_items = 0
-		if pos_profile:
-			warehouse, hide_unavailable_items = frappe.db.get_value(
-				"POS Profile", pos_profile, ["warehouse", "hide_unavailable_items"]
-			)
-		else:
-			warehouse = None
+		warehouse, hide_unavailable_items = get_pos_profile_stock_settings(pos_profile)
 		
 		# Build bin join for stock availability
 		bin_join_selection, bin_join_condition = "", ""
@@ -283,27 +351,48 @@ def get_items(start=0, page_length=50, pos_profile=None, item_group=None, price_
 			modified_condition = "AND item.modified > %(last_updated)s"
 			sql_params["last_updated"] = last_updated_dt.strftime("%Y-%m-%d %H:%M:%S")
 		
-		# First, get total count for pagination metadata
-		total_count_data = frappe.db.sql(
-			f"""
-			SELECT COUNT(*) as total
-			FROM `tabItem` item {bin_join_selection}
-			WHERE
-				item.disabled = 0
-				AND item.has_variants = 0
-				AND item.is_sales_item = 1
-				AND item.is_fixed_asset = 0
-				AND item.item_group in (SELECT name FROM `tabItem Group` WHERE lft >= {cint(lft)} AND rgt <= {cint(rgt)})
-				AND {condition}
-				{bin_join_condition}
-				{modified_condition}
-			""",
-			sql_params,
-			as_dict=1,
-		)
-		total_count = total_count_data[0]["total"] if total_count_data else 0
+		# Restrict to the item group subtree with a join on Item Group's (lft, rgt)
+		item_group_join = ""
+		if item_group_bounds:
+			item_group_join = """JOIN `tabItem Group` ig ON ig.name = item.item_group
+				AND ig.lft >= %(item_group_lft)s AND ig.rgt <= %(item_group_rgt)s"""
+			sql_params["item_group_lft"], sql_params["item_group_rgt"] = item_group_bounds
+		
+		# Keyset pagination: seek past the last row of the previous page instead of scanning an OFFSET
+		keyset_condition = ""
+		if after_modified and after_name:
+			keyset_condition = """AND (item.modified < %(after_modified)s
+				OR (item.modified = %(after_modified)s AND item.name > %(after_name)s))"""
+			sql_params["after_modified"] = after_modified
+			sql_params["after_name"] = after_name
+			start = 0
+		
+		# Total count is only computed on explicit request, and cached briefly since it only drives pagination UI
+		total_count = None
+		if cint(include_total):
+			count_cache_key = f"golbazaar_items_count:{pos_profile}:{item_group}:{search_term}:{last_updated_time}"
+			total_count = frappe.cache().get_value(count_cache_key)
+			if total_count is None:
+				total_count_data = frappe.db.sql(
+					f"""
+					SELECT COUNT(*) as total
+					FROM `tabItem` item {item_group_join} {bin_join_selection}
+					WHERE
+						item.disabled = 0
+						AND item.has_variants = 0
+						AND item.is_sales_item = 1
+						AND item.is_fixed_asset = 0
+						AND {condition}
+						{bin_join_condition}
+						{modified_condition}
+					""",
+					sql_params,
+					as_dict=1,
+				)
+				total_count = total_count_data[0]["total"] if total_count_data else 0
+				frappe.cache().set_value(count_cache_key, total_count, expires_in_sec=30)
 		
-		# Fetch items with pagination
+		# Fetch items with pagination (one extra row tells whether another page exists)
 		items_data = frappe.db.sql(
 			f"""
 			SELECT
@@ -316,28 +405,43 @@ def get_items(start=0, page_length=50, pos_profile=None, item_group=None, price_
 				item.sales_uom,
 				item.item_group,
 				item.variant_of,
+				(IFNULL(item.variant_of, '') != '') AS is_variant,
+				item.variant_of AS parent_name,
 				item.custom_discount_type,
 				item.custom_discount_value,
-				item.modified
+				item.modified,
+				(
+					SELECT JSON_ARRAYAGG(JSON_OBJECT(
+						'item_tax_template', it.item_tax_template,
+						'tax_category', it.tax_category,
+						'valid_from', it.valid_from,
+						'minimum_net_rate', it.minimum_net_rate,
+						'maximum_net_rate', it.maximum_net_rate
+					))
+					FROM `tabItem Tax` it
+					WHERE it.parent = item.name AND it.parenttype = 'Item'
+				) AS taxes_json
 			FROM
-				`tabItem` item {bin_join_selection}
+				`tabItem` item {item_group_join} {bin_join_selection}
 			WHERE
 				item.disabled = 0
 				AND item.has_variants = 0
 				AND item.is_sales_item = 1
 				AND item.is_fixed_asset = 0
-				AND item.item_group in (SELECT name FROM `tabItem Group` WHERE lft >= {cint(lft)} AND rgt <= {cint(rgt)})
 				AND {condition}
 				{bin_join_condition}
 				{modified_condition}
+				{keyset_condition}
 			ORDER BY
 				item.modified desc, item.name asc
 			LIMIT
-				{cint(page_length)} offset {cint(start)}
+				{cint(page_length) + 1} offset {cint(start)}
 			""",
 			sql_params,
 			as_dict=1,
 		)
+		has_more = len(items_data) > page_length
+		items_data = items_data[:page_length]
 		
 		# If no results, return empty list with pagination metadata
 		if not items_data:
@@ -347,151 +451,138 @@ def get_items(start=0, page_length=50, pos_profile=None, item_group=None, price_
 				"limit": page_length,
 				"offset": start,
 				"has_more": False,
-				"next_offset": None
+				"next_offset": None,
+				"next_cursor": None,
 			}
 		
+		last = items_data[-1]
+		next_cursor = {"modified": str(last.modified), "name": last.item_code} if has_more else None
+		
 		# Get current date for price validation
 		current_date = frappe.utils.today()
-		
-		# Process each item
-		for item in items_data:
-			# Get stock availability
-			if warehouse:
-				item.actual_qty, _ = get_stock_availability(item.item_code, warehouse)
-			
-			# Get item prices
-			item_prices = []
-			if price_list:
-				item_prices = frappe.get_all(
-					"Item Price",
-					fields=["price_list_rate", "currency", "uom", "batch_no", "valid_from", "valid_upto"],
-					filters={
-						"price_list": price_list,
-						"item_code": item.item_code,
-						"selling": True,
-						"valid_from": ["<=", current_date],
-						"valid_upto": ["in", [None, "", current_date]],
-					},
-					order_by="valid_from desc",
+
+		item_codes = [item.item_code for item in items_data]
+
+		# Fetch item prices for the whole page in one query, grouped by item_code
+		prices_by_item = {}
+		if price_list:
+			prices = frappe.get_all(
+				"Item Price",
+				fields=["item_code", "price_list_rate", "currency", "uom", "batch_no", "valid_from", "valid_upto"],
+				filters={
+					"price_list": price_list,
+					"item_code": ["in", item_codes],
+					"selling": True,
+					"valid_from": ["<=", current_date],
+					"valid_upto": ["in", [None, "", current_date]],
+				},
+				order_by="valid_from desc",
+			)
+			for price in prices:
+				prices_by_item.setdefault(price.item_code, []).append(price)
+
+		# Fetch stock availability for the whole page: Bin qty less the qty reserved by submitted,
+		# not yet consolidated POS Invoices (as get_stock_availability does), one query each
+		qty_by_item = {}
+		if warehouse:
+			stock_codes = [item.item_code for item in items_data if item.is_stock_item]
+			if stock_codes:
+				bins = frappe.get_all(
+					"Bin",
+					fields=["item_code", "actual_qty"],
+					filters={"warehouse": warehouse, "item_code": ["in", stock_codes]},
 				)
-			
-			# Get default UOM and price
-			stock_uom_price = next((d for d in item_prices if d.get("uom") == item.stock_uom), {})
-			item_uom = item.stock_uom
-			item_uom_price = stock_uom_price
-			
-			# Check for sales UOM
-			if item.sales_uom and item.sales_uom != item.stock_uom:
-				item_uom = item.sales_uom
-				sales_uom_price = next((d for d in item_prices if d.get("uom") == item.sales_uom), {})
-				if sales_uom_price:
-					item_uom_price = sales_uom_price
-			
-			# If no specific UOM price found, use first available
-			if item_prices and not item_uom_price:
-				item_uom = item_prices[0].get("uom")
-				item_uom_price = item_prices[0]
-			
-			# Get conversion factor
-			item_conversion_factor = get_conversion_factor(item.item_code, item_uom).get("conversion_factor")
-			
-			# Adjust quantity based on conversion factor
-			if item.stock_uom != item_uom:
-				item.actual_qty = item.actual_qty // item_conversion_factor
-			
-			# Adjust price based on conversion factor
-			if item_uom_price and item_uom != item_uom_price.get("uom"):
-				item_uom_price.price_list_rate = item_uom_price.price_list_rate * item_conversion_factor
-			
-			# Build result item
-			row = {
-				**item,
-				"price_list_rate": item_uom_price.get("price_list_rate") if item_uom_price else 0,
-				"currency": item_uom_price.get("currency") if item_uom_price else "",
-				"uom": item_uom,
-				"batch_no": item_uom_price.get("batch_no") if item_uom_price else None,
-				"modified": item.modified.strftime("%Y-%m-%d %H:%M:%S") if hasattr(item, 'modified') and item.modified else None,
-			}
-			
-			# Pack discount info using custom fields
-			if item.get("custom_discount_type") and item.get("custom_discount_value"):
-				row["discount"] = {
-					"type": item.get("custom_discount_type"),
-					"value": item.get("custom_discount_value")
-				}
-			
-			# Remove custom discount fields from payload
-			row.pop("custom_discount_type", None)
-			row.pop("custom_discount_value", None)
-			
-			# Check if this item is a variant
-			template = item.get("variant_of")
-			if template:
-				row["is_variant"] = True
-				row["parent_name"] = template
-				# Get attributes for this variant
-				attrs = frappe.get_all(
-					"Item Variant Attribute",
-					fields=["attribute", "attribute_value as value", "numeric_values", "from_range", "to_range", "increment"],
-					filters={"parent": item.item_code}
+				qty_by_item = {b.item_code: flt(b.actual_qty) for b in bins}
+				reserved = frappe.db.sql(
+					"""
+					SELECT p_item.item_code, SUM(p_item.stock_qty)
+					FROM `tabPOS Invoice` p_inv
+					JOIN `tabPOS Invoice Item` p_item ON p_item.parent = p_inv.name
+					WHERE IFNULL(p_inv.consolidated_invoice, '') = ''
+						AND p_inv.docstatus = 1
+						AND p_item.docstatus = 1
+						AND p_item.warehouse = %(warehouse)s
+						AND p_item.item_code IN %(item_codes)s
+					GROUP BY p_item.item_code
+					""",
+					{"warehouse": warehouse, "item_codes": tuple(stock_codes)},
 				)
-				row["attributes"] = attrs
-			else:
-				row["is_variant"] = False
-			
-			result.append(row)
-		
-		# Attach taxes for all items in batch (Item Tax child table)
-		if result:
-			item_codes_batch = [r.get("item_code") for r in result]
-			taxes_rows = frappe.get_all(
-				"Item Tax",
-				fields=[
-					"parent as item_code",
-					"item_tax_template",
-					"tax_category",
-					"valid_from",
-					"minimum_net_rate",
-					"maximum_net_rate",
-				],
-				filters={"parent": ["in", item_codes_batch]},
+				for item_code, reserved_qty in reserved:
+					qty_by_item[item_code] = qty_by_item.get(item_code, 0) - flt(reserved_qty)
+
+			# Product Bundles are non-stock items whose availability comes from their components:
+			# keep ERPNext's per-item logic for those
+			non_stock_codes = [item.item_code for item in items_data if not item.is_stock_item]
+			if non_stock_codes:
+				for bundle in frappe.get_all("Product Bundle", filters={"name": ["in", non_stock_codes]}, pluck="name"):
+					qty_by_item[bundle] = get_stock_availability(bundle, warehouse)[0]
+
+		# Fetch variant attributes for all variants on the page in one query
+		attrs_by_parent = {}
+		variant_codes = [item.item_code for item in items_data if item.variant_of]
+		if variant_codes:
+			all_attrs = frappe.get_all(
+				"Item Variant Attribute",
+				fields=["parent", "attribute", "attribute_value as value", "numeric_values", "from_range", "to_range", "increment"],
+				filters={"parent": ["in", variant_codes]},
 			)
-			taxes_map = {}
-			for tr in taxes_rows:
-				taxes_map.setdefault(tr["item_code"], []).append({
-					"item_tax_template": tr.get("item_tax_template"),
-					"tax_category": tr.get("tax_category"),
-					"valid_from": tr.get("valid_from"),
-					"minimum_net_rate": tr.get("minimum_net_rate"),
-					"maximum_net_rate": tr.get("maximum_net_rate"),
-				})
-			for r in result:
-				code = r.get("item_code")
-				if code in taxes_map:
-					r["taxes"] = taxes_map[code]
+			for attr in all_attrs:
+				attrs_by_parent.setdefault(attr.pop("parent"), []).append(attr)
+
+		# Fetch UOM conversion factors for the page (and variant templates) in one query
+		conv = {}
+		conv_parents = set(item_codes)
+		conv_parents.update(item.variant_of for item in items_data if item.variant_of)
+		conv_rows = frappe.get_all(
+			"UOM Conversion Detail",
+			fields=["parent", "uom", "conversion_factor"],
+			filters={"parent": ["in", list(conv_parents)], "parenttype": "Item"},
+		)
+		for r in conv_rows:
+			conv.setdefault(r.parent, {})[r.uom] = r.conversion_factor
+
+		# Resolve selling UOM, price and conversion factor per item from the prebuilt maps
+		# (lazily, so only the result list is materialized)
+		resolved = (_resolve_item_uom(item, prices_by_item.get(item.item_code, ()), conv) for item in items_data)
+		
+		# Build result rows in a single pass
+		result = [
+			{
+				"item_code": item.item_code,
+				"item_name": item.item_name,
+				"description": item.description,
+				"stock_uom": item.stock_uom,
+				"item_image": item.item_image,
+				"is_stock_item": item.is_stock_item,
+				"sales_uom": item.sales_uom,
+				"item_group": item.item_group,
+				"variant_of": item.variant_of,
+				"is_variant": bool(item.is_variant),
+				"parent_name": item.parent_name,
+				"attributes": attrs_by_parent.get(item.item_code, []),
+				"taxes": json.loads(item.taxes_json) if item.taxes_json else [],
+				# Stock is reported in the selling UOM (non-stock, non-bundle items default to 0)
+				"actual_qty": (
+					qty_by_item.get(item.item_code, 0) // factor if factor else qty_by_item.get(item.item_code, 0)
+				) if warehouse else None,
+				"price_list_rate": price_list_rate,
+				"currency": currency,
+				"uom": uom,
+				"batch_no": batch_no,
+				"discount": {
+					"type": item.custom_discount_type,
+					"value": item.custom_discount_value,
+				} if item.custom_discount_type and item.custom_discount_value else None,
+				"modified": item.modified.strftime("%Y-%m-%d %H:%M:%S") if item.modified else None,
+			}
+			for item, (uom, price_list_rate, currency, batch_no, factor) in zip(items_data, resolved)
+		]
 		
 		# Calculate pagination metadata
-		has_more = (start + page_length) < total_count
 		next_offset = start + page_length if has_more else None
 		
-		# If last_updated_time is provided, mark these items as synced by updating their modified time
-		if last_updated_time and result:
-			try:
-				current_time = frappe.utils.now_datetime()
-				item_codes = [item["item_code"] for item in result]
-				
-				# Update modified timestamp for synced items
-				if item_codes:
-					# Build safe parameter list for SQL
-					placeholders = ','.join(['%s'] * len(item_codes))
-					frappe.db.sql(f"""
-						UPDATE `tabItem` 
-						SET modified = %(modified)s 
-						WHERE name IN ({placeholders})
-					""", [current_time] + item_codes)
-					frappe.db.commit()
-			except Exception as e:
-				frappe.log_error(frappe.get_traceback(), "Mark Items Synced Error")
+		# Clients pass sync_cursor back as last_updated_time on the next incremental sync
+		sync_cursor = max(item.modified for item in items_data).strftime("%Y-%m-%d %H:%M:%S")
 		
 		return {
 			"items": result,
@@ -499,7 +590,9 @@ def get_items(start=0, page_length=50, pos_profile=None, item_group=None, price_
 			"limit": page_length,
 			"offset": start,
 			"has_more": has_more,
-			"next_offset": next_offset
+			"next_offset": next_offset,
+			"next_cursor": next_cursor,
+			"sync_cursor": sync_cursor,
 		}
 		
 	except Exception as e:
@@ -508,6 +601,47 @@ def get_items(start=0, page_length=50, pos_profile=None, item_group=None, price_
 		return {"message": {"error": str(e)}}
 
 
+@redis_cache(ttl=600)
+def get_company_tax_templates(company):
+	"""Return Item Tax Templates of a company with their details (cached in Redis)."""
+	# Get all Item Tax Templates
+	tax_templates = frappe.get_all(
+		"Item Tax Template",
+		fields=["name", "title", "company"],
+		filters={"company": company},
+		order_by="title"
+	)
+	if not tax_templates:
+		return []
+	
+	# Get tax rates for all templates in one query
+	details = frappe.get_all(
+		"Item Tax Template Detail",
+		fields=["parent", "tax_type", "tax_rate"],
+		filters={"parent": ["in", [t.name for t in tax_templates]]},
+		order_by="parent, idx"
+	)
+	details_by_parent = {}
+	for d in details:
+		details_by_parent.setdefault(d.pop("parent"), []).append(d)
+	
+	return [
+		{
+			"name": template.name,
+			"title": template.title,
+			"company": template.company,
+			"tax_details": details_by_parent.get(template.name, []),
+		}
+		for template in tax_templates
+	]
+
+
+def clear_tax_template_cache(doc, method=None):
+	"""doc_events hook: drop cached tax templates when an Item Tax Template changes."""
+	get_company_tax_templates.clear_cache()
+	frappe.cache().hdel("golbazaar_item_tax_template_details", doc.name)
+
+
 @frappe.whitelist(allow_guest=True)
 def get_tax(company):
 	"""
@@ -524,35 +658,7 @@ def get_tax(company):
 			frappe.local.response.http_status_code = 400
 			return {"message": {"error": "Company parameter is required"}}
 		
-		# Build filter for company
-		filters = {"company": company}
-		
-		# Get all Item Tax Templates
-		tax_templates = frappe.get_all(
-			"Item Tax Template",
-			fields=["name", "title", "company"],
-			filters=filters,
-			order_by="title"
-		)
-		
-		result = []
-		for template in tax_templates:
-			# Get tax rates for this template
-			tax_details = frappe.get_all(
-				"Item Tax Template Detail",
-				fields=["tax_type", "tax_rate"],
-				filters={"parent": template.name},
-				order_by="idx"
-			)
-			
-			result.append({
-				"name": template.name,
-				"title": template.title,
-				"company": template.company,
-				"tax_details": tax_details
-			})
-		
-		return {"taxes": result}
+		return {"taxes": get_company_tax_templates(company)}
 		
 	except Exception as e:
 		frappe.log_error(frappe.get_traceback(), "Get Tax Error")
@@ -561,24 +667,24 @@ def get_tax(company):
 
 
 @frappe.whitelist(allow_guest=True)
-def get_customers(start=0, page_length=50, search_term="", last_updated_time=None):
+def get_customers(start=0, page_length=50, search_term="", last_updated_time=None, after_modified=None, after_name=None, include_total=0):
 	"""
 	Get customers for POS
 	Similar to get_items with pagination and incremental sync
 	
 	Parameters:
-	- start: Pagination offset (default: 0)
+	- start: Pagination offset (default: 0, ignored when a cursor is passed)
 	- page_length: Number of customers per page (default: 50)
 	- search_term: Search term for filtering customers (optional)
 	- last_updated_time: Only fetch customers modified after this time (format: "YYYY-MM-DD HH:MM:SS")
+	- after_modified, after_name: Keyset cursor, pass back "next_cursor" of the previous page
+	- include_total: Set to 1 to also compute "total" (runs an extra COUNT query)
 	
 	Returns:
-	- {"customers": [...], "total": 100, "limit": 50, "offset": 0, "has_more": true, "next_offset": 50}
+	- {"customers": [...], "total": null, "limit": 50, "offset": 0, "has_more": true, "next_offset": 50,
+	   "next_cursor": {"modified": "...", "name": "..."}, "sync_cursor": "YYYY-MM-DD HH:MM:SS"}
 	"""
 	try:
-		from frappe.utils import cint
-		from datetime import datetime
-		
 		# Convert to integers
 		start = cint(start)
 		page_length = cint(page_length)
@@ -613,22 +719,37 @@ def get_customers(start=0, page_length=50, search_term="", last_updated_time=Non
 			)"""
 			sql_params["search"] = f"%{search_term}%"
 		
-		# Get total count for pagination metadata
-		total_count_data = frappe.db.sql(
-			f"""
-			SELECT COUNT(*) as total
-			FROM `tabCustomer` customer
-			WHERE
-				customer.disabled = 0
-				{search_condition}
-				{modified_condition}
-			""",
-			sql_params,
-			as_dict=1,
-		)
-		total_count = total_count_data[0]["total"] if total_count_data else 0
+		# Keyset pagination: seek past the last row of the previous page instead of scanning an OFFSET
+		keyset_condition = ""
+		if after_modified and after_name:
+			keyset_condition = """AND (customer.modified < %(after_modified)s
+				OR (customer.modified = %(after_modified)s AND customer.name > %(after_name)s))"""
+			sql_params["after_modified"] = after_modified
+			sql_params["after_name"] = after_name
+			start = 0
+		
+		# Total count is only computed on explicit request, and cached briefly since it only drives pagination UI
+		total_count = None
+		if cint(include_total):
+			count_cache_key = f"golbazaar_customers_count:{search_term}:{last_updated_time}"
+			total_count = frappe.cache().get_value(count_cache_key)
+			if total_count is None:
+				total_count_data = frappe.db.sql(
+					f"""
+					SELECT COUNT(*) as total
+					FROM `tabCustomer` customer
+					WHERE
+						customer.disabled = 0
+						{search_condition}
+						{modified_condition}
+					""",
+					sql_params,
+					as_dict=1,
+				)
+				total_count = total_count_data[0]["total"] if total_count_data else 0
+				frappe.cache().set_value(count_cache_key, total_count, expires_in_sec=30)
 		
-		# Fetch customers with pagination
+		# Fetch customers with pagination (one extra row to know whether another page exists)
 		customers_data = frappe.db.sql(
 			f"""
 			SELECT
@@ -647,14 +768,17 @@ def get_customers(start=0, page_length=50, search_term="", last_updated_time=Non
 				customer.disabled = 0
 				{search_condition}
 				{modified_condition}
+				{keyset_condition}
 			ORDER BY
 				customer.modified desc, customer.name asc
 			LIMIT
-				{cint(page_length)} offset {cint(start)}
+				{cint(page_length) + 1} offset {cint(start)}
 			""",
 			sql_params,
 			as_dict=1,
 		)
+		has_more = len(customers_data) > page_length
+		customers_data = customers_data[:page_length]
 		
 		# If no results, return empty list with pagination metadata
 		if not customers_data:
@@ -664,36 +788,46 @@ def get_customers(start=0, page_length=50, search_term="", last_updated_time=Non
 				"limit": page_length,
 				"offset": start,
 				"has_more": False,
-				"next_offset": None
+				"next_offset": None,
+				"next_cursor": None,
 			}
 		
+		last = customers_data[-1]
+		next_cursor = {"modified": str(last.modified), "name": last.customer_id} if has_more else None
+		
+		# Get addresses for all customers on the page in one query (first match per customer wins)
+		customer_ids = [customer.customer_id for customer in customers_data]
+		address_rows = frappe.db.sql(
+			"""
+			SELECT
+				dl.link_name,
+				address.address_line1,
+				address.address_line2,
+				address.city,
+				address.state,
+				address.country,
+				address.pincode,
+				address.phone,
+				address.fax,
+				address.email_id
+			FROM
+				`tabAddress` address
+				JOIN `tabDynamic Link` dl ON dl.parent = address.name
+			WHERE
+				dl.link_doctype = 'Customer'
+				AND dl.parenttype = 'Address'
+				AND dl.link_name IN %(customer_ids)s
+			""",
+			{"customer_ids": customer_ids},
+			as_dict=1,
+		)
+		addr_by_customer = {}
+		for row in address_rows:
+			addr_by_customer.setdefault(row.pop("link_name"), row)
+		
 		# Process each customer
 		for customer in customers_data:
-			# Get primary address for the customer
-			addresses = frappe.db.get_all("Dynamic Link",
-				filters={
-					"link_doctype": "Customer",
-					"link_name": customer.customer_id,
-					"parenttype": "Address",
-				},
-				fields=["parent"],
-				limit=1
-			)
-			
-			address_data = None
-			if addresses:
-				address = frappe.get_doc("Address", addresses[0].parent)
-				address_data = {
-					"address_line1": address.address_line1,
-					"address_line2": address.address_line2,
-					"city": address.city,
-					"state": address.state,
-					"country": address.country,
-					"pincode": address.pincode,
-					"phone": address.phone,
-					"fax": address.fax,
-					"email_id": address.email_id,
-				}
+			address_data = addr_by_customer.get(customer.customer_id)
 			
 			result.append({
 				"customer_id": customer.customer_id,
@@ -710,26 +844,10 @@ def get_customers(start=0, page_length=50, search_term="", last_updated_time=Non
 			})
 		
 		# Calculate pagination metadata
-		has_more = (start + page_length) < total_count
 		next_offset = start + page_length if has_more else None
 		
-		# If last_updated_time is provided, mark these customers as synced by updating their modified time
-		if last_updated_time and result:
-			try:
-				current_time = frappe.utils.now_datetime()
-				customer_ids = [customer["customer_id"] for customer in result]
-				
-				# Update modified timestamp for synced customers
-				if customer_ids:
-					placeholders = ','.join(['%s'] * len(customer_ids))
-					frappe.db.sql(f"""
-						UPDATE `tabCustomer` 
-						SET modified = %(modified)s 
-						WHERE name IN ({placeholders})
-					""", [current_time] + customer_ids)
-					frappe.db.commit()
-			except Exception as e:
-				frappe.log_error(frappe.get_traceback(), "Mark Customers Synced Error")
+		# Clients pass sync_cursor back as last_updated_time on the next incremental sync
+		sync_cursor = max(customer.modified for customer in customers_data).strftime("%Y-%m-%d %H:%M:%S")
 		
 		return {
 			"customers": result,
@@ -737,7 +855,9 @@ def get_customers(start=0, page_length=50, search_term="", last_updated_time=Non
 			"limit": page_length,
 			"offset": start,
 			"has_more": has_more,
-			"next_offset": next_offset
+			"next_offset": next_offset,
+			"next_cursor": next_cursor,
+			"sync_cursor": sync_cursor,
 		}
 		
 	except Exception as e:
@@ -746,6 +866,62 @@ def get_customers(start=0, page_length=50, search_term="", last_updated_time=Non
 		return {"message": {"error": str(e)}}
 
 
+# POS Profile field -> response key returned by get_pos_settings
+POS_SETTINGS_MAP = (
+	("posa_search_limit", "search_limit_number"),
+	("posa_server_cache_duration", "server_cache_duration"),
+	("posa_use_server_cache", "use_server_cache"),
+	("posa_local_storage", "use_browser_local_storage"),
+	("posa_tax_inclusive", "tax_inclusive"),
+	("posa_search_batch_no", "search_by_batch_number"),
+	("posa_search_serial_no", "search_by_serial_number"),
+	("posa_allow_submissions_in_background_job", "allow_submissions_in_background_job"),
+
+	("posa_allow_mpesa_reconcile_payments", "allow_mpesa_reconcile_payments"),
+	("posa_allow_reconcile_payments", "allow_reconcile_payments"),
+	("posa_allow_make_new_payments", "allow_make_new_payments"),
+	("posa_use_pos_awesome_payments", "use_gol_bazaar_payments"),
+	("posa_allow_duplicate_customer_names", "allow_duplicate_customer_names"),
+	("posa_auto_set_delivery_charges", "auto_set_delivery_charges"),
+	("posa_use_delivery_charges", "use_delivery_charges"),
+	("posa_allow_print_draft_invoices", "allow_print_draft_invoices"),
+	("posa_input_qty", "use_qty_input"),
+	("posa_new_line", "allow_add_new_items_on_new_line"),
+	("posa_allow_write_off_change", "allow_write_off_change"),
+	("posa_display_additional_notes", "display_additional_notes"),
+	("posa_allow_print_last_invoice", "allow_print_last_invoice"),
+	("posa_allow_customer_purchase_order", "allow_customer_purchase_order"),
+	("posa_fetch_coupon", "auto_fetch_coupon_gifts"),
+	("posa_hide_variants_items", "hide_variants_items"),
+	("posa_show_template_items", "show_template_items"),
+	("posa_allow_sales_order", "allow_create_sales_order"),
+
+	("posa_allow_zero_rated_items", "allow_zero_rated_items"),
+	("posa_display_item_code", "display_item_code"),
+	("posa_auto_set_batch", "auto_set_batch"),
+	("posa_hide_closing_shift", "hide_close_shift"),
+	("posa_apply_customer_discount", "apply_customer_discount"),
+	("posa_allow_return", "allow_return"),
+	("posa_allow_credit_sale", "allow_credit_sale"),
+	("posa_allow_partial_payment", "allow_partial_payment"),
+	("posa_display_items_in_stock", "hide_unavailable_items"),
+	("posa_allow_user_to_edit_item_discount", "allow_user_to_edit_item_discount"),
+
+	("posa_default_sales_order", "default_sales_order"),
+	("posa_default_card_view", "default_card_view"),
+	("posa_allow_change_posting_date", "allow_change_posting_date"),
+	("posa_scale_barcode_start", "scale_barcode_start_with"),
+	("posa_max_discount_allowed", "max_discount_percentage_allowed"),
+	("posa_use_percentage_discount", "use_percentage_discount"),
+	("posa_allow_user_to_edit_additional_discount", "allow_user_to_edit_additional_discount"),
+	("posa_allow_user_to_edit_rate", "allow_user_to_edit_rate"),
+	("posa_allow_delete", "auto_delete_draft_invoice"),
+	("posa_cash_mode_of_payment", "cash_mode_of_payment"),
+	# Map the new field to the output response
+	("gol_show_variant_inside_item", "show_variant_inside_item"),
+)
+
+
 @frappe.whitelist(allow_guest=True)
 def get_pos_settings(pos_profile):
     """
@@ -762,125 +938,18 @@ def get_pos_settings(pos_profile):
             frappe.local.response.http_status_code = 400
             return {"message": {"error": "pos_profile is required"}}
 
-        if not frappe.db.exists("POS Profile", pos_profile):
+        if not frappe.get_cached_value("POS Profile", pos_profile, "name"):
             frappe.local.response.http_status_code = 404
             return {"message": {"error": "POS Profile not found"}}
 
-        doc = frappe.get_doc("POS Profile", pos_profile)
-        data = doc.as_dict()
-
-        # Required POS Awesome fields
-        required_fields = [
-            "posa_search_limit",
-            "posa_server_cache_duration",
-            "posa_use_server_cache",
-            "posa_local_storage",
-            "posa_tax_inclusive",
-            "posa_search_batch_no",
-            "posa_search_serial_no",
-            "posa_allow_submissions_in_background_job",
-
-            "posa_allow_mpesa_reconcile_payments",
-            "posa_allow_reconcile_payments",
-            "posa_allow_make_new_payments",
-            "posa_use_pos_awesome_payments",
-            "posa_allow_duplicate_customer_names",
-            "posa_auto_set_delivery_charges",
-            "posa_use_delivery_charges",
-            "posa_allow_print_draft_invoices",
-            "posa_input_qty",
-            "posa_new_line",
-            "posa_allow_write_off_change",
-            "posa_display_additional_notes",
-            "posa_allow_print_last_invoice",
-            "posa_allow_customer_purchase_order",
-            "posa_fetch_coupon",
-            "posa_hide_variants_items",
-            "posa_show_template_items",
-            "posa_allow_sales_order",
-
-            "posa_allow_zero_rated_items",
-            "posa_display_item_code",
-            "posa_auto_set_batch",
-            "posa_hide_closing_shift",
-            "posa_apply_customer_discount",
-            "posa_allow_return",
-            "posa_allow_credit_sale",
-            "posa_allow_partial_payment",
-            "posa_display_items_in_stock",
-            "posa_allow_user_to_edit_item_discount",
-
-            "posa_default_sales_order",
-            "posa_default_card_view",
-            "posa_allow_change_posting_date",
-            "posa_scale_barcode_start",
-            "posa_max_discount_allowed",
-            "posa_use_percentage_discount",
-            "posa_allow_user_to_edit_additional_discount",
-            "posa_allow_user_to_edit_rate",
-            "posa_allow_delete",
-            "posa_cash_mode_of_payment",
-            # Add new required field for variant display inside item
-            "gol_show_variant_inside_item",
-        ]
-
-        # Map fields to requested response keys
-        key_map = {
-            "posa_search_limit": "search_limit_number",
-            "posa_server_cache_duration": "server_cache_duration",
-            "posa_use_server_cache": "use_server_cache",
-            "posa_local_storage": "use_browser_local_storage",
-            "posa_tax_inclusive": "tax_inclusive",
-            "posa_search_batch_no": "search_by_batch_number",
-            "posa_search_serial_no": "search_by_serial_number",
-            "posa_allow_submissions_in_background_job": "allow_submissions_in_background_job",
-
-            "posa_allow_mpesa_reconcile_payments": "allow_mpesa_reconcile_payments",
-            "posa_allow_reconcile_payments": "allow_reconcile_payments",
-            "posa_allow_make_new_payments": "allow_make_new_payments",
-            "posa_use_pos_awesome_payments": "use_gol_bazaar_payments",
-            "posa_allow_duplicate_customer_names": "allow_duplicate_customer_names",
-            "posa_auto_set_delivery_charges": "auto_set_delivery_charges",
-            "posa_use_delivery_charges": "use_delivery_charges",
-            "posa_allow_print_draft_invoices": "allow_print_draft_invoices",
-            "posa_input_qty": "use_qty_input",
-            "posa_new_line": "allow_add_new_items_on_new_line",
-            "posa_allow_write_off_change": "allow_write_off_change",
-            "posa_display_additional_notes": "display_additional_notes",
-            "posa_allow_print_last_invoice": "allow_print_last_invoice",
-            "posa_allow_customer_purchase_order": "allow_customer_purchase_order",
-            "posa_fetch_coupon": "auto_fetch_coupon_gifts",
-            "posa_hide_variants_items": "hide_variants_items",
-            "posa_show_template_items": "show_template_items",
-            "posa_allow_sales_order": "allow_create_sales_order",
-
-            "posa_allow_zero_rated_items": "allow_zero_rated_items",
-            "posa_display_item_code": "display_item_code",
-            "posa_auto_set_batch": "auto_set_batch",
-            "posa_hide_closing_shift": "hide_close_shift",
-            "posa_apply_customer_discount": "apply_customer_discount",
-            "posa_allow_return": "allow_return",
-            "posa_allow_credit_sale": "allow_credit_sale",
-            "posa_allow_partial_payment": "allow_partial_payment",
-            "posa_display_items_in_stock": "hide_unavailable_items",
-            "posa_allow_user_to_edit_item_discount": "allow_user_to_edit_item_discount",
-
-            "posa_default_sales_order": "default_sales_order",
-            "posa_default_card_view": "default_card_view",
-            "posa_allow_change_posting_date": "allow_change_posting_date",
-            "posa_scale_barcode_start": "scale_barcode_start_with",
-            "posa_max_discount_allowed": "max_discount_percentage_allowed",
-            "posa_use_percentage_discount": "use_percentage_discount",
-            "posa_allow_user_to_edit_additional_discount": "allow_user_to_edit_additional_discount",
-            "posa_allow_user_to_edit_rate": "allow_user_to_edit_rate",
-            "posa_allow_delete": "auto_delete_draft_invoice",
-            "posa_cash_mode_of_payment": "cash_mode_of_payment",
-            # Map the new field to the output response
-            "gol_show_variant_inside_item": "show_variant_inside_item",
-        }
+        # Read only the mapped columns instead of loading the doc with all its child tables;
+        # fields not installed on this site are returned as None
+        meta = frappe.get_meta("POS Profile")
+        fields = [src for src, _dst in POS_SETTINGS_MAP if meta.has_field(src)]
+        data = frappe.db.get_value("POS Profile", pos_profile, fields, as_dict=True) or {}
 
         # Build response: keys are the provided labels
-        pos_settings = { key_map[f]: data.get(f) for f in required_fields if f in key_map }
+        pos_settings = {dst: data.get(src) for src, dst in POS_SETTINGS_MAP}
 
         return {"pos_settings": pos_settings, "pos_profile": pos_profile}
     except Exception as e:
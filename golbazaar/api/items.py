@@ -1,7 +1,33 @@
 import frappe
 from frappe import _
-from frappe.utils import flt, cint, cstr
+from frappe.utils import flt, cint, cstr, make_filter_tuple
 import json
+import hashlib
+import re
+from collections import defaultdict
+from types import MappingProxyType
+
+from golbazaar.pos_item_cache import (
+	POS_ITEM_STATS_CACHE_KEY,
+	get_pos_single_value,
+	get_valid_names,
+	has_item_fulltext_index,
+)
+
+
+# Default filters for POS, copied per request before caller filters are merged in
+DEFAULT_POS_FILTERS = MappingProxyType({
+	"is_sales_item": 1,
+	"disabled": 0
+})
+
+# Default fields for POS (minimal payload)
+DEFAULT_POS_FIELDS = [
+	"item_code", "item_name", "item_group", "stock_uom", "standard_rate",
+	"is_sales_item", "disabled", "image", "brand", "description",
+	"has_variants", "variant_of", "is_stock_item", "grant_commission",
+	"max_discount", "valuation_rate"
+]
 
 
 @frappe.whitelist()
@@ -31,68 +57,53 @@ def get_pos_items(filters=None, fields=None, limit=50, offset=0, search_term=Non
 			fields = json.loads(fields)
 		
 		# Default filters for POS
-		default_filters = {
-			"is_sales_item": 1,
-			"disabled": 0
-		}
+		default_filters = dict(DEFAULT_POS_FILTERS)
 		
 		# Merge with provided filters
 		if filters:
 			default_filters.update(filters)
 		
-		# Default fields for POS (minimal payload)
-		default_fields = [
-			"item_code", "item_name", "item_group", "stock_uom", "standard_rate",
-			"is_sales_item", "disabled", "image", "brand", "description",
-			"has_variants", "variant_of", "is_stock_item", "grant_commission",
-			"max_discount", "valuation_rate"
-		]
-		
 		# Use provided fields or defaults
-		fields_to_fetch = fields if fields else default_fields
+		fields_to_fetch = fields if fields else DEFAULT_POS_FIELDS
 		
 		# Add search functionality
+		query_filters = default_filters
 		or_filters = []
 		if search_term:
 			search_term = cstr(search_term).strip()
-			or_filters = [
-				["item_name", "like", f"%{search_term}%"],
-				["item_code", "like", f"%{search_term}%"],
-				["description", "like", f"%{search_term}%"]
-			]
+			query_filters, or_filters = apply_item_text_search(search_term, default_filters)
 		
-		# Get items
+		# Get items (one extra row tells whether another page exists)
 		items = frappe.get_list(
 			"Item",
 			fields=fields_to_fetch,
-			filters=default_filters,
+			filters=query_filters,
 			or_filters=or_filters,
-			limit_page_length=cint(limit),
+			limit_page_length=cint(limit) + 1,
 			limit_start=cint(offset),
 			order_by="item_name asc",
 			ignore_permissions=True
 		)
+		has_more = len(items) > cint(limit)
+		del items[cint(limit):]
 		
-		# Get total count for pagination
-		total_count = frappe.db.count("Item", default_filters)
+		# Get total count for pagination (skipped for searches, clients page on has_more)
+		total_count = None if search_term else get_cached_item_count(default_filters)
 		
-		# Enhance items with related data
-		enhanced_items = []
-		for item in items:
-			enhanced_item = enhance_pos_item(item)
-			enhanced_items.append(enhanced_item)
+		# Enhance items with related data (fetched for the whole page at once)
+		enhanced_items = enhance_pos_items(items)
 		
 		return {
 			"success": True,
 			"items": enhanced_items,
 			"total_count": total_count,
-			"has_more": (cint(offset) + len(items)) < total_count,
+			"has_more": has_more,
 			"limit": cint(limit),
 			"offset": cint(offset)
 		}
 		
 	except Exception as e:
-		frappe.log_error(f"Error in get_pos_items: {str(e)}")
+		log_error_once(f"Error in get_pos_items: {str(e)}")
 		return {
 			"success": False,
 			"error": str(e),
@@ -102,14 +113,42 @@ def get_pos_items(filters=None, fields=None, limit=50, offset=0, search_term=Non
 
 
 @frappe.whitelist(allow_guest=True)
-def get_pos_item_by_code(item_code):
-	"""Get single POS item by item code with all related data."""
+def get_pos_item_by_code(item_code, warehouse=None, price_list=None):
+	"""
+	Get single POS item by item code with all related data.
+	Stock (for warehouse, if given) and price (for price_list, if given) come from the same query.
+	"""
 	try:
-		item = frappe.get_doc("Item", item_code)
-		if not item:
+		fields = ", ".join(f"item.`{f}`" for f in DEFAULT_POS_FIELDS)
+		bin_condition = "AND bin.warehouse = %(warehouse)s" if warehouse else ""
+		items = frappe.db.sql(
+			f"""
+			SELECT {fields},
+				(
+					SELECT bin.actual_qty FROM `tabBin` bin
+					WHERE bin.item_code = item.name {bin_condition}
+					LIMIT 1
+				) as stock_qty,
+				price.price_list_rate, price.currency
+			FROM `tabItem` item
+			LEFT JOIN `tabItem Price` price
+				ON price.item_code = item.name AND price.price_list = %(price_list)s
+			WHERE item.name = %(item_code)s
+			LIMIT 1
+			""",
+			{"item_code": item_code, "warehouse": warehouse, "price_list": price_list},
+			as_dict=True
+		)
+		if not items:
 			return {"success": False, "error": "Item not found"}
 		
-		enhanced_item = enhance_pos_item(item.as_dict())
+		item = items[0]
+		if item.disabled or not item.is_sales_item:
+			return {"success": False, "error": "Item is not available for sale"}
+		barcodes_map, cust_map = get_item_barcodes_and_customer_codes([item_code])
+		stock_map = {item_code: flt(item.pop("stock_qty"))}
+		
+		enhanced_item = enhance_pos_item(item, barcodes_map, cust_map, stock_map)
 		return {
 			"success": True,
 			"item": enhanced_item
@@ -130,6 +169,7 @@ def search_pos_items(query, limit=20):
 		if not query:
 			return {"success": False, "error": "Empty search query"}
 		
+		limit = cint(limit)
 		results = []
 		
 		# 1. Barcode search (exact match)
@@ -141,9 +181,12 @@ def search_pos_items(query, limit=20):
 				"matched_field": "barcode"
 			})
 		
+		# A scanned numeric barcode is unambiguous, skip the slower searches
+		scanned = bool(barcode_item) and query.isdigit() and len(query) >= 8
+		
 		# 2. Customer code search
-		customer_items = search_by_customer_code(query)
-		if customer_items:
+		if not scanned and len(results) < limit:
+			customer_items = search_by_customer_code(query)
 			for item in customer_items:
 				results.append({
 					"item": item,
@@ -152,25 +195,29 @@ def search_pos_items(query, limit=20):
 				})
 		
 		# 3. Text search (name, code, description)
-		text_items = search_by_text(query, limit)
-		for item in text_items:
-			results.append({
-				"item": item,
-				"match_type": "text",
-				"matched_field": "name"
-			})
+		if not scanned and len(results) < limit:
+			text_items = search_by_text(query, limit)
+			for item in text_items:
+				results.append({
+					"item": item,
+					"match_type": "text",
+					"matched_field": "name"
+				})
 		
-		# Remove duplicates based on item_code
-		seen_codes = set()
-		unique_results = []
+		# Remove duplicates based on item_code (first match wins)
+		unique = {}
 		for result in results:
-			if result["item"]["item_code"] not in seen_codes:
-				seen_codes.add(result["item"]["item_code"])
-				unique_results.append(result)
+			unique.setdefault(result["item"]["item_code"], result)
+		unique_results = list(unique.values())
+		
+		# Enhance only the results that are returned, in one batch
+		page = unique_results[:limit]
+		for result, item in zip(page, enhance_pos_items([r["item"] for r in page])):
+			result["item"] = item
 		
 		return {
 			"success": True,
-			"results": unique_results[:limit],
+			"results": page,
 			"total": len(unique_results)
 		}
 		
@@ -188,17 +235,19 @@ def get_pos_item_stock(item_code, warehouse=None):
 	try:
 		# Get default warehouse if not provided
 		if not warehouse:
-			warehouse = frappe.db.get_single_value("Stock Settings", "default_warehouse")
+			warehouse = get_pos_single_value("Stock Settings", "default_warehouse")
 		
 		# Get stock from Bin
-		bin_data = frappe.db.get_value(
-			"Bin",
-			{"item_code": item_code, "warehouse": warehouse},
-			["actual_qty", "reserved_qty", "ordered_qty", "projected_qty"],
-			as_dict=True
-		)
+		bin_data = frappe.db.sql("""
+			SELECT actual_qty, reserved_qty, ordered_qty, projected_qty,
+				(actual_qty - reserved_qty) as available_qty
+			FROM `tabBin`
+			WHERE item_code = %s AND warehouse = %s
+			LIMIT 1
+		""", (item_code, warehouse), as_dict=True)
 		
 		if bin_data:
+			bin_data = bin_data[0]
 			return {
 				"success": True,
 				"item_code": item_code,
@@ -207,7 +256,7 @@ def get_pos_item_stock(item_code, warehouse=None):
 				"reserved_qty": flt(bin_data.reserved_qty),
 				"ordered_qty": flt(bin_data.ordered_qty),
 				"projected_qty": flt(bin_data.projected_qty),
-				"available_qty": flt(bin_data.actual_qty) - flt(bin_data.reserved_qty)
+				"available_qty": flt(bin_data.available_qty)
 			}
 		else:
 			return {
@@ -234,7 +283,7 @@ def get_pos_item_price(item_code, price_list=None):
 	try:
 		# Get default price list if not provided
 		if not price_list:
-			price_list = frappe.db.get_single_value("Selling Settings", "selling_price_list")
+			price_list = get_pos_single_value("Selling Settings", "selling_price_list")
 		
 		# Get item price
 		price_data = frappe.db.get_value(
@@ -245,14 +294,14 @@ def get_pos_item_price(item_code, price_list=None):
 		)
 		
 		# Get item's standard rate as fallback
-		item = frappe.get_doc("Item", item_code)
+		standard_rate = flt(frappe.db.get_value("Item", item_code, "standard_rate"))
 		
 		return {
 			"success": True,
 			"item_code": item_code,
 			"price_list": price_list,
-			"base_price": flt(item.standard_rate),
-			"price_list_rate": flt(price_data.price_list_rate) if price_data else flt(item.standard_rate),
+			"base_price": standard_rate,
+			"price_list_rate": flt(price_data.price_list_rate) if price_data else standard_rate,
 			"currency": price_data.currency if price_data else "INR",
 			"valid_from": price_data.valid_from if price_data else None,
 			"valid_upto": price_data.valid_upto if price_data else None
@@ -317,7 +366,9 @@ def get_pos_item_customer_codes(item_code):
 def get_pos_item_variants(item_code):
 	"""Get variants for a template item."""
 	try:
-		item = frappe.get_doc("Item", item_code)
+		item = frappe.db.get_value("Item", item_code, ["has_variants", "variant_based_on"], as_dict=True)
+		if not item:
+			return {"success": False, "error": "Item not found"}
 		
 		if not item.has_variants:
 			return {
@@ -342,10 +393,8 @@ def get_pos_item_variants(item_code):
 		)
 		
 		# Group attributes by variant
-		attributes_by_variant = {}
+		attributes_by_variant = defaultdict(dict)
 		for attr in variant_attributes:
-			if attr["parent"] not in attributes_by_variant:
-				attributes_by_variant[attr["parent"]] = {}
 			attributes_by_variant[attr["parent"]][attr["attribute"]] = attr["attribute_value"]
 		
 		# Enhance variants with attributes
@@ -384,30 +433,27 @@ def get_pos_items_by_company_warehouse(company=None, warehouse=None, filters=Non
 		
 		# Get default company if not provided
 		if not company:
-			company = frappe.db.get_single_value("Global Defaults", "default_company")
+			company = get_pos_single_value("Global Defaults", "default_company")
 		
 		# Get default warehouse if not provided
 		if not warehouse:
-			warehouse = frappe.db.get_single_value("Stock Settings", "default_warehouse")
+			warehouse = get_pos_single_value("Stock Settings", "default_warehouse")
 		
 		# Validate company and warehouse exist
-		if not frappe.db.exists("Company", company):
+		if company not in get_valid_names("Company"):
 			return {
 				"success": False,
 				"error": f"Company '{company}' not found"
 			}
 		
-		if not frappe.db.exists("Warehouse", warehouse):
+		if warehouse not in get_valid_names("Warehouse"):
 			return {
 				"success": False,
 				"error": f"Warehouse '{warehouse}' not found"
 			}
 		
 		# Default filters for POS
-		default_filters = {
-			"is_sales_item": 1,
-			"disabled": 0
-		}
+		default_filters = dict(DEFAULT_POS_FILTERS)
 		
 		# Merge with provided filters
 		if filters:
@@ -425,41 +471,37 @@ def get_pos_items_by_company_warehouse(company=None, warehouse=None, filters=Non
 		fields_to_fetch = fields if fields else default_fields
 		
 		# Add search functionality
+		query_filters = default_filters
 		or_filters = []
 		if search_term:
 			search_term = cstr(search_term).strip()
-			or_filters = [
-				["item_name", "like", f"%{search_term}%"],
-				["item_code", "like", f"%{search_term}%"],
-				["description", "like", f"%{search_term}%"]
-			]
+			query_filters, or_filters = apply_item_text_search(search_term, default_filters)
 		
-		# Get items
+		# Get items (one extra row tells whether another page exists)
 		items = frappe.get_list(
 			"Item",
 			fields=fields_to_fetch,
-			filters=default_filters,
+			filters=query_filters,
 			or_filters=or_filters,
-			limit_page_length=cint(limit),
+			limit_page_length=cint(limit) + 1,
 			limit_start=cint(offset),
 			order_by="item_name asc",
 			ignore_permissions=True
 		)
+		has_more = len(items) > cint(limit)
+		del items[cint(limit):]
 		
-		# Get total count for pagination
-		total_count = frappe.db.count("Item", default_filters)
+		# Get total count for pagination (skipped for searches, clients page on has_more)
+		total_count = None if search_term else get_cached_item_count(default_filters)
 		
-		# Enhance items with company/warehouse specific data
-		enhanced_items = []
-		for item in items:
-			enhanced_item = enhance_pos_item_with_warehouse(item, company, warehouse)
-			enhanced_items.append(enhanced_item)
+		# Enhance items with company/warehouse specific data (fetched for the whole page at once)
+		enhanced_items = enhance_pos_items_with_warehouse(items, company, warehouse)
 		
 		return {
 			"success": True,
 			"items": enhanced_items,
 			"total_count": total_count,
-			"has_more": (cint(offset) + len(items)) < total_count,
+			"has_more": has_more,
 			"limit": cint(limit),
 			"offset": cint(offset),
 			"company": company,
@@ -468,7 +510,7 @@ def get_pos_items_by_company_warehouse(company=None, warehouse=None, filters=Non
 		}
 		
 	except Exception as e:
-		frappe.log_error(f"Error in get_pos_items_by_company_warehouse: {str(e)}")
+		log_error_once(f"Error in get_pos_items_by_company_warehouse: {str(e)}")
 		return {
 			"success": False,
 			"error": str(e),
@@ -479,27 +521,25 @@ def get_pos_items_by_company_warehouse(company=None, warehouse=None, filters=Non
 
 @frappe.whitelist(allow_guest=True)
 def get_pos_item_statistics():
-	"""Get POS item statistics."""
+	"""Get POS item statistics (cached for 60 seconds, cleared when an Item changes)."""
+	cached = frappe.cache().get_value(POS_ITEM_STATS_CACHE_KEY)
+	if cached:
+		return cached
+	
 	try:
-		# Get basic counts
-		total_items = frappe.db.count("Item", {"is_sales_item": 1})
-		active_items = frappe.db.count("Item", {"is_sales_item": 1, "disabled": 0})
-		disabled_items = frappe.db.count("Item", {"is_sales_item": 1, "disabled": 1})
-		items_with_variants = frappe.db.count("Item", {"is_sales_item": 1, "has_variants": 1})
-		
-		# Get average price
-		avg_price = frappe.db.sql("""
-			SELECT AVG(standard_rate) as avg_price
-			FROM `tabItem`
-			WHERE is_sales_item = 1 AND disabled = 0 AND standard_rate > 0
-		""", as_dict=True)
-		
-		# Get price range
-		price_range = frappe.db.sql("""
-			SELECT MIN(standard_rate) as min_price, MAX(standard_rate) as max_price
+		# Get counts and price stats in a single pass over sales items
+		stats = frappe.db.sql("""
+			SELECT
+				COUNT(*) as total_items,
+				SUM(CASE WHEN disabled = 0 THEN 1 ELSE 0 END) as active_items,
+				SUM(CASE WHEN disabled = 1 THEN 1 ELSE 0 END) as disabled_items,
+				SUM(CASE WHEN has_variants = 1 THEN 1 ELSE 0 END) as items_with_variants,
+				AVG(CASE WHEN disabled = 0 AND standard_rate > 0 THEN standard_rate END) as avg_price,
+				MIN(CASE WHEN disabled = 0 AND standard_rate > 0 THEN standard_rate END) as min_price,
+				MAX(CASE WHEN disabled = 0 AND standard_rate > 0 THEN standard_rate END) as max_price
 			FROM `tabItem`
-			WHERE is_sales_item = 1 AND disabled = 0 AND standard_rate > 0
-		""", as_dict=True)
+			WHERE is_sales_item = 1
+		""", as_dict=True)[0]
 		
 		# Get top brands
 		top_brands = frappe.db.sql("""
@@ -521,20 +561,22 @@ def get_pos_item_statistics():
 			LIMIT 10
 		""", as_dict=True)
 		
-		return {
+		result = {
 			"success": True,
-			"total_items": total_items,
-			"active_items": active_items,
-			"disabled_items": disabled_items,
-			"items_with_variants": items_with_variants,
-			"average_price": flt(avg_price[0].avg_price) if avg_price else 0,
+			"total_items": cint(stats.total_items),
+			"active_items": cint(stats.active_items),
+			"disabled_items": cint(stats.disabled_items),
+			"items_with_variants": cint(stats.items_with_variants),
+			"average_price": flt(stats.avg_price),
 			"price_range": {
-				"min": flt(price_range[0].min_price) if price_range else 0,
-				"max": flt(price_range[0].max_price) if price_range else 0
+				"min": flt(stats.min_price),
+				"max": flt(stats.max_price)
 			},
 			"top_brands": top_brands,
 			"top_categories": top_categories
 		}
+		frappe.cache().set_value(POS_ITEM_STATS_CACHE_KEY, result, expires_in_sec=60)
+		return result
 		
 	except Exception as e:
 		return {
@@ -544,217 +586,240 @@ def get_pos_item_statistics():
 
 
 # Helper functions
-def enhance_pos_item(item):
-	"""Enhance item with related data for POS."""
-	try:
-		# Get barcodes
-		barcodes = frappe.get_all(
-			"Item Barcode",
-			fields=["barcode", "barcode_type"],
-			filters={"parent": item["item_code"]}
-		)
-		
-		# Get customer codes
-		customer_items = frappe.get_all(
-			"Item Customer Detail",
-			fields=["customer", "ref_code", "ref_name"],
-			filters={"parent": item["item_code"]}
-		)
-		
-		# Get stock info (if available)
-		stock_qty = None
-		try:
-			bin_data = frappe.db.get_value(
-				"Bin",
-				{"item_code": item["item_code"]},
-				"actual_qty"
-			)
-			stock_qty = flt(bin_data) if bin_data else 0
-		except:
-			pass
-		
-		# Enhance item
-		enhanced_item = {
-			**item,
-			"barcodes": [b["barcode"] for b in barcodes],
-			"customer_codes": [c["ref_code"] for c in customer_items if c["ref_code"]],
-			"stock_qty": stock_qty,
-			"display_name": item.get("item_name", item.get("item_code")),
-			"short_name": item.get("item_name", "")[:20] + "..." if len(item.get("item_name", "")) > 20 else item.get("item_name", ""),
-			"category_display": item.get("item_group", "")
-		}
-		
-		return enhanced_item
-		
-	except Exception as e:
-		frappe.log_error(f"Error enhancing POS item {item.get('item_code', 'unknown')}: {str(e)}")
-		return item
-
-
-def enhance_pos_item_with_warehouse(item, company, warehouse):
-	"""Enhance item with company and warehouse specific data for POS."""
-	try:
-		# Get barcodes
-		barcodes = frappe.get_all(
-			"Item Barcode",
-			fields=["barcode", "barcode_type"],
-			filters={"parent": item["item_code"]}
-		)
-		
-		# Get customer codes
-		customer_items = frappe.get_all(
-			"Item Customer Detail",
-			fields=["customer", "ref_code", "ref_name"],
-			filters={"parent": item["item_code"]}
-		)
-		
-		# Get stock info for specific warehouse
-		stock_info = get_item_stock_info(item["item_code"], warehouse)
-		
-		# Get company-specific item defaults
-		item_defaults = get_item_defaults(item["item_code"], company)
-		
-		# Get price list rate for company
-		price_info = get_item_price_info(item["item_code"], company)
-		
-		# Enhance item
-		enhanced_item = dict(item)  # Create a copy of the original item
-		enhanced_item.update({
-			"barcodes": [b["barcode"] for b in barcodes],
-			"customer_codes": [c["ref_code"] for c in customer_items if c["ref_code"]],
-			"stock_info": stock_info,
-			"item_defaults": item_defaults,
-			"price_info": price_info,
-			"company": company,
-			"warehouse": warehouse,
-			"display_name": item.get("item_name", item.get("item_code")),
-			"short_name": item.get("item_name", "")[:20] + "..." if len(item.get("item_name", "")) > 20 else item.get("item_name", ""),
-			"category_display": item.get("item_group", ""),
-			"is_available": stock_info.get("available_qty", 0) > 0,
-			"stock_status": get_stock_status(stock_info.get("available_qty", 0))
-		})
-		
-		return enhanced_item
-		
-	except Exception as e:
-		frappe.log_error(f"Error enhancing POS item with warehouse {item.get('item_code', 'unknown')}: {str(e)}")
-		# Return original item with basic enhancement
-		return {
-			**item,
-			"company": company,
-			"warehouse": warehouse,
-			"barcodes": [],
-			"customer_codes": [],
-			"stock_info": {"available_qty": 0, "warehouse": warehouse},
-			"item_defaults": {},
-			"price_info": {"base_price": item.get("standard_rate", 0)},
-			"is_available": False,
-			"stock_status": "out_of_stock"
-		}
+def log_error_once(message, interval=60):
+	"""Write message to the Error Log at most once per interval seconds, so a failing endpoint polled by many terminals logs once."""
+	cache_key = "golbazaar:error_seen:" + hashlib.md5(message.encode()).hexdigest()
+	if frappe.cache().get_value(cache_key):
+		return
+	frappe.cache().set_value(cache_key, 1, expires_in_sec=interval)
+	frappe.log_error(message)
+
+
+def get_cached_item_count(filters):
+	"""Count Items matching filters, cached for 60 seconds per filter set."""
+	cache_key = "golbazaar:pos_item_count:" + hashlib.md5(
+		json.dumps(filters, sort_keys=True, default=str).encode()
+	).hexdigest()
+	total_count = frappe.cache().get_value(cache_key)
+	if total_count is None:
+		total_count = frappe.db.count("Item", filters)
+		frappe.cache().set_value(cache_key, total_count, expires_in_sec=60)
+	return total_count
+
+
+def get_item_barcodes_and_customer_codes(item_codes):
+	"""Get barcodes and customer codes for several items, grouped by item code."""
+	barcodes_map = defaultdict(list)
+	cust_map = defaultdict(list)
+	if not item_codes:
+		return barcodes_map, cust_map
+	
+	# Get barcodes
+	for b in frappe.get_all(
+		"Item Barcode",
+		fields=["parent", "barcode"],
+		filters={"parent": ["in", item_codes]}
+	):
+		barcodes_map[b.parent].append(b.barcode)
+	
+	# Get customer codes
+	for c in frappe.get_all(
+		"Item Customer Detail",
+		fields=["parent", "ref_code"],
+		filters={"parent": ["in", item_codes]}
+	):
+		if c.ref_code:
+			cust_map[c.parent].append(c.ref_code)
+	
+	return barcodes_map, cust_map
+
+
+def get_short_name(item_name, length=20):
+	"""Truncate an item name for compact POS tiles."""
+	item_name = item_name or ""
+	return item_name[:length] + "..." if len(item_name) > length else item_name
+
+
+def enhance_pos_items(items):
+	"""Enhance a list of items for POS, fetching barcodes, customer codes and stock for all of them at once."""
+	item_codes = [item.get("item_code") for item in items if item.get("item_code")]
+	barcodes_map, cust_map = get_item_barcodes_and_customer_codes(item_codes)
+	
+	# Get stock info (if available), first Bin per item
+	stock_map = {}
+	if item_codes:
+		for b in frappe.get_all(
+			"Bin",
+			fields=["item_code", "actual_qty"],
+			filters={"item_code": ["in", item_codes]}
+		):
+			stock_map.setdefault(b.item_code, flt(b.actual_qty))
+	
+	return [enhance_pos_item(item, barcodes_map, cust_map, stock_map) for item in items]
 
 
-def get_item_stock_info(item_code, warehouse):
-	"""Get comprehensive stock information for an item in a specific warehouse."""
-	try:
-		# Get stock from Bin
-		bin_data = frappe.db.get_value(
-			"Bin",
-			{"item_code": item_code, "warehouse": warehouse},
-			["actual_qty", "reserved_qty", "ordered_qty", "projected_qty", "valuation_rate"],
-			as_dict=True
+def enhance_pos_item(item, barcodes_map, cust_map, stock_map):
+	"""
+	Enhance item with related data for POS, read from maps prefetched by enhance_pos_items.
+	The item dict is updated in place (rows are freshly fetched per request) and returned.
+	"""
+	item_code = item.get("item_code")
+	item.update({
+		"barcodes": barcodes_map.get(item_code, []),
+		"customer_codes": cust_map.get(item_code, []),
+		"stock_qty": stock_map.get(item_code, 0),
+		"display_name": item.get("item_name", item_code),
+		"short_name": get_short_name(item.get("item_name")),
+		"category_display": item.get("item_group", "")
+	})
+	return item
+
+
+def enhance_pos_items_with_warehouse(items, company, warehouse):
+	"""Enhance a list of items with company and warehouse specific data, batching every per-item lookup."""
+	item_codes = [item.get("item_code") for item in items if item.get("item_code")]
+	barcodes_map, cust_map = get_item_barcodes_and_customer_codes(item_codes)
+	stock_map = get_items_stock_info(item_codes, warehouse)
+	defaults_map = get_items_defaults(item_codes, company)
+	price_map = get_items_price_info(item_codes, company)
+	
+	return [
+		enhance_pos_item_with_warehouse(
+			item, company, warehouse, barcodes_map, cust_map, stock_map, defaults_map, price_map
 		)
-		
-		if bin_data:
-			return {
-				"warehouse": warehouse,
-				"actual_qty": flt(bin_data.actual_qty),
-				"reserved_qty": flt(bin_data.reserved_qty),
-				"ordered_qty": flt(bin_data.ordered_qty),
-				"projected_qty": flt(bin_data.projected_qty),
-				"available_qty": flt(bin_data.actual_qty) - flt(bin_data.reserved_qty),
-				"valuation_rate": flt(bin_data.valuation_rate),
-				"stock_value": flt(bin_data.actual_qty) * flt(bin_data.valuation_rate)
-			}
-		else:
-			return {
-				"warehouse": warehouse,
-				"actual_qty": 0,
-				"reserved_qty": 0,
-				"ordered_qty": 0,
-				"projected_qty": 0,
-				"available_qty": 0,
-				"valuation_rate": 0,
-				"stock_value": 0
-			}
-			
-	except Exception as e:
-		frappe.log_error(f"Error getting stock info for {item_code} in {warehouse}: {str(e)}")
-		return {
+		for item in items
+	]
+
+
+def enhance_pos_item_with_warehouse(item, company, warehouse, barcodes_map, cust_map, stock_map, defaults_map, price_map):
+	"""Enhance item with company and warehouse specific data for POS, updating the item dict in place."""
+	item_code = item.get("item_code")
+	
+	# Get stock info for specific warehouse
+	stock_info = stock_map.get(item_code) or get_empty_stock_info(warehouse)
+	
+	# Get company-specific item defaults
+	item_defaults = defaults_map.get(item_code, {})
+	
+	# Get price list rate for company
+	price_info = price_map.get(item_code, {"base_price": item.get("standard_rate", 0)})
+	
+	# Enhance item
+	item.update({
+		"barcodes": barcodes_map.get(item_code, []),
+		"customer_codes": cust_map.get(item_code, []),
+		"stock_info": stock_info,
+		"item_defaults": item_defaults,
+		"price_info": price_info,
+		"company": company,
+		"warehouse": warehouse,
+		"display_name": item.get("item_name", item_code),
+		"short_name": get_short_name(item.get("item_name")),
+		"category_display": item.get("item_group", ""),
+		"is_available": stock_info.get("available_qty", 0) > 0,
+		"stock_status": get_stock_status(stock_info.get("available_qty", 0))
+	})
+	
+	return item
+
+
+def get_empty_stock_info(warehouse):
+	"""Stock information for an item with no Bin in the warehouse."""
+	return {
+		"warehouse": warehouse,
+		"actual_qty": 0,
+		"reserved_qty": 0,
+		"ordered_qty": 0,
+		"projected_qty": 0,
+		"available_qty": 0,
+		"valuation_rate": 0,
+		"stock_value": 0
+	}
+
+
+def get_items_stock_info(item_codes, warehouse):
+	"""Get comprehensive stock information for several items in a specific warehouse, keyed by item code."""
+	if not item_codes:
+		return {}
+	
+	# Get stock from Bin for all items in one query
+	bins = frappe.db.sql("""
+		SELECT item_code, actual_qty, reserved_qty, ordered_qty, projected_qty, valuation_rate,
+			(actual_qty - reserved_qty) as available_qty,
+			(actual_qty * valuation_rate) as stock_value
+		FROM `tabBin`
+		WHERE warehouse = %s AND item_code IN %s
+	""", (warehouse, tuple(item_codes)), as_dict=True)
+	
+	return {
+		bin_data.item_code: {
 			"warehouse": warehouse,
-			"actual_qty": 0,
-			"reserved_qty": 0,
-			"ordered_qty": 0,
-			"projected_qty": 0,
-			"available_qty": 0,
-			"valuation_rate": 0,
-			"stock_value": 0
+			"actual_qty": flt(bin_data.actual_qty),
+			"reserved_qty": flt(bin_data.reserved_qty),
+			"ordered_qty": flt(bin_data.ordered_qty),
+			"projected_qty": flt(bin_data.projected_qty),
+			"available_qty": flt(bin_data.available_qty),
+			"valuation_rate": flt(bin_data.valuation_rate),
+			"stock_value": flt(bin_data.stock_value)
 		}
+		for bin_data in bins
+	}
 
 
-def get_item_defaults(item_code, company):
-	"""Get item defaults for a specific company."""
-	try:
-		defaults = frappe.db.get_value(
-			"Item Default",
-			{"parent": item_code, "company": company},
-			["default_warehouse", "default_price_list", "buying_cost_center", 
-			 "default_supplier", "expense_account", "selling_cost_center", "income_account"],
-			as_dict=True
-		)
-		
-		return defaults if defaults else {}
-		
-	except Exception as e:
-		frappe.log_error(f"Error getting item defaults for {item_code} in {company}: {str(e)}")
+def get_items_defaults(item_codes, company):
+	"""Get item defaults for several items in a specific company, keyed by item code."""
+	if not item_codes:
 		return {}
-
-
-def get_item_price_info(item_code, company):
-	"""Get price information for an item in a specific company context."""
-	try:
-		# Get company's default price list
-		price_list = frappe.db.get_single_value("Selling Settings", "selling_price_list")
-		
-		# Get item price
-		price_data = frappe.db.get_value(
+	
+	defaults = frappe.get_all(
+		"Item Default",
+		fields=["parent", "default_warehouse", "default_price_list", "buying_cost_center",
+				"default_supplier", "expense_account", "selling_cost_center", "income_account"],
+		filters={"parent": ["in", item_codes], "company": company}
+	)
+	
+	defaults_map = {}
+	for d in defaults:
+		defaults_map.setdefault(d.pop("parent"), d)
+	return defaults_map
+
+
+def get_items_price_info(item_codes, company):
+	"""Get price information for several items in a specific company context, keyed by item code."""
+	# Get company's default price list
+	price_list = get_pos_single_value("Selling Settings", "selling_price_list")
+	
+	# Get item prices
+	price_map = {}
+	if item_codes:
+		for p in frappe.get_all(
 			"Item Price",
-			{"item_code": item_code, "price_list": price_list},
-			["price_list_rate", "currency", "valid_from", "valid_upto"],
-			as_dict=True
-		)
-		
-		# Get item's standard rate as fallback
-		item = frappe.get_doc("Item", item_code)
-		
-		return {
+			fields=["item_code", "price_list_rate", "currency", "valid_from", "valid_upto"],
+			filters={"item_code": ["in", item_codes], "price_list": price_list}
+		):
+			price_map.setdefault(p.item_code, p)
+	
+	# Get items' standard rate as fallback
+	standard_rates = dict(frappe.get_all(
+		"Item",
+		fields=["name", "standard_rate"],
+		filters={"name": ["in", item_codes]},
+		as_list=True
+	)) if item_codes else {}
+	
+	price_info = {}
+	for item_code in item_codes:
+		price_data = price_map.get(item_code)
+		standard_rate = flt(standard_rates.get(item_code))
+		price_info[item_code] = {
 			"price_list": price_list,
-			"base_price": flt(item.standard_rate),
-			"price_list_rate": flt(price_data.price_list_rate) if price_data else flt(item.standard_rate),
+			"base_price": standard_rate,
+			"price_list_rate": flt(price_data.price_list_rate) if price_data else standard_rate,
 			"currency": price_data.currency if price_data else "INR",
 			"valid_from": price_data.valid_from if price_data else None,
 			"valid_upto": price_data.valid_upto if price_data else None
 		}
-		
-	except Exception as e:
-		frappe.log_error(f"Error getting price info for {item_code} in {company}: {str(e)}")
-		return {
-			"price_list": None,
-			"base_price": 0,
-			"price_list_rate": 0,
-			"currency": "INR",
-			"valid_from": None,
-			"valid_upto": None
-		}
+	return price_info
 
 
 def get_stock_status(available_qty):
@@ -767,67 +832,105 @@ def get_stock_status(available_qty):
 		return "in_stock"
 
 
-def search_by_barcode(barcode):
-	"""Search item by barcode."""
-	try:
-		item_barcode = frappe.db.get_value(
-			"Item Barcode",
-			{"barcode": barcode},
-			"parent"
-		)
-		
-		if item_barcode:
-			item = frappe.get_doc("Item", item_barcode)
-			if item.is_sales_item and not item.disabled:
-				return enhance_pos_item(item.as_dict())
+def get_fulltext_condition(search_term):
+	"""
+	SQL condition matching search_term through the idx_item_fts FULLTEXT index (MariaDB).
+	Returns None when the index is missing or cannot serve the term, so callers fall back to LIKE.
+	"""
+	if not has_item_fulltext_index():
 		return None
-		
-	except Exception:
+	
+	# Every word must match as a prefix; words shorter than the default
+	# innodb_ft_min_token_size are not indexed
+	words = [w for w in re.split(r"\W+", search_term) if w]
+	if not words or min(len(w) for w in words) < 3:
 		return None
+	
+	return "MATCH(`tabItem`.item_name, `tabItem`.item_code, `tabItem`.description) AGAINST({} IN BOOLEAN MODE)".format(
+		frappe.db.escape(" ".join(f"+{w}*" for w in words))
+	)
+
+
+def apply_item_text_search(search_term, filters):
+	"""
+	Return (filters, or_filters) for an Item query restricted to a text search on name, code
+	and description. On MariaDB with the FULLTEXT index the MATCH predicate is added to the
+	filters themselves, so it is applied together with the other filters, ordering and paging
+	of the main query. Otherwise LIKE or_filters are returned, which the pg_trgm indexes serve
+	on Postgres.
+	"""
+	condition = get_fulltext_condition(search_term)
+	if condition:
+		return [make_filter_tuple("Item", field, value) for field, value in filters.items()] + [condition], []
+	
+	# Escape LIKE wildcards so the term matches literally
+	pattern = "%{}%".format(
+		search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+	)
+	return filters, [
+		["item_name", "like", pattern],
+		["item_code", "like", pattern],
+		["description", "like", pattern]
+	]
+
+
+def search_by_barcode(barcode):
+	"""Search item by barcode. Returns the raw item row; search_pos_items enhances the final results."""
+	# Resolve the barcode and load the item in one query
+	fields = ", ".join(f"item.`{f}`" for f in DEFAULT_POS_FIELDS)
+	items = frappe.db.sql(
+		f"""
+		SELECT {fields}
+		FROM `tabItem` item
+		JOIN `tabItem Barcode` barcode ON barcode.parent = item.name
+		WHERE barcode.barcode = %s
+			AND item.is_sales_item = 1
+			AND item.disabled = 0
+		LIMIT 1
+		""",
+		(barcode,),
+		as_dict=True
+	)
+	
+	return items[0] if items else None
 
 
 def search_by_customer_code(customer_code):
-	"""Search items by customer code."""
-	try:
-		customer_items = frappe.get_all(
-			"Item Customer Detail",
-			fields=["parent"],
-			filters={"ref_code": customer_code}
-		)
-		
-		items = []
-		for ci in customer_items:
-			item = frappe.get_doc("Item", ci.parent)
-			if item.is_sales_item and not item.disabled:
-				items.append(enhance_pos_item(item.as_dict()))
-		
-		return items
-		
-	except Exception:
+	"""Search items by customer code. Returns raw item rows."""
+	customer_items = frappe.get_all(
+		"Item Customer Detail",
+		fields=["parent"],
+		filters={"ref_code": customer_code}
+	)
+	
+	if not customer_items:
 		return []
+	
+	items = frappe.get_all(
+		"Item",
+		fields=DEFAULT_POS_FIELDS,
+		filters={
+			"name": ["in", list({ci.parent for ci in customer_items})],
+			"is_sales_item": 1,
+			"disabled": 0
+		}
+	)
+	
+	return items
 
 
 def search_by_text(query, limit=20):
-	"""Search items by text (name, code, description)."""
-	try:
-		items = frappe.get_all(
-			"Item",
-			fields=["item_code", "item_name", "item_group", "stock_uom", "standard_rate",
-					"is_sales_item", "disabled", "image", "brand", "description"],
-			filters={
-				"is_sales_item": 1,
-				"disabled": 0
-			},
-			or_filters=[
-				["item_name", "like", f"%{query}%"],
-				["item_code", "like", f"%{query}%"],
-				["description", "like", f"%{query}%"]
-			],
-			limit_page_length=limit
-		)
-		
-		return [enhance_pos_item(item) for item in items]
-		
-	except Exception:
-		return []
+	"""Search items by text (name, code, description). Returns raw item rows."""
+	filters, or_filters = apply_item_text_search(query, dict(DEFAULT_POS_FILTERS))
+	
+	items = frappe.get_all(
+		"Item",
+		fields=["item_code", "item_name", "item_group", "stock_uom", "standard_rate",
+				"is_sales_item", "disabled", "image", "brand", "description"],
+		filters=filters,
+		or_filters=or_filters,
+		limit_page_length=limit
+	)
+	
+	return items
 
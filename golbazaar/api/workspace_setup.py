@@ -16,18 +16,17 @@ def ensure_golbazaar_workspace() -> str:
 		"content": "[]",
 	}
 	if existing:
-		# update minimal fields to ensure visibility
+		# update minimal fields to ensure visibility, skipping the write when nothing changed
 		ws = frappe.get_doc("Workspace", ws_name)
-		for k, v in data.items():
-			if k != "doctype":
-				setattr(ws, k, v)
+		changed = {k: v for k, v in data.items() if k != "doctype" and ws.get(k) != v}
+		if not changed:
+			return "unchanged"
+		ws.update(changed)
 		ws.save(ignore_permissions=True)
-		frappe.db.commit()
 		return "updated"
 	# create fresh
 	ws = frappe.get_doc(data)
 	ws.insert(ignore_permissions=True)
-	frappe.db.commit()
 	return "created"
 
 
@@ -1,41 +1,79 @@
+import base64
+import json
+import re
+
 import frappe
 from frappe import _
+from frappe.utils import cint
+
+from golbazaar.utils import get_idempotent_response, has_field, set_idempotent_response
+
+_EMAIL_RE = re.compile(r"[^@]+@[^@]+\.[^@]+")
+_MOBILE_RE = re.compile(r"\d{7,15}")
+
+# Redis set mirroring Customer names, kept in sync by Customer doc_events. Names are
+# stored lowercased because the name column compares case-insensitively. The set also
+# holds a marker member (NUL cannot occur in a name) recording that it has been loaded,
+# so an evicted set is reloaded instead of looking empty.
+CUSTOMER_NAMES_KEY = "golbazaar:customer_names"
+CUSTOMER_NAMES_LOADED_MARKER = "\x00loaded"
+
+
+def _customer_name_taken(name: str) -> bool:
+    """Whether a Customer named name exists. A hit in the cached name set is trusted; a miss
+    is confirmed against the database, since the set may be partial or stale."""
+    cache = frappe.cache()
+    if not cache.sismember(CUSTOMER_NAMES_KEY, CUSTOMER_NAMES_LOADED_MARKER):
+        names = [n.lower() for n in frappe.get_all("Customer", pluck="name")]
+        for i in range(0, len(names), 1000):
+            cache.sadd(CUSTOMER_NAMES_KEY, *names[i:i + 1000])
+        cache.sadd(CUSTOMER_NAMES_KEY, CUSTOMER_NAMES_LOADED_MARKER)
+    if cache.sismember(CUSTOMER_NAMES_KEY, name.lower()):
+        return True
+    if frappe.db.exists("Customer", name):
+        cache.sadd(CUSTOMER_NAMES_KEY, name.lower())
+        return True
+    return False
+
+
+def _add_customer_name_after_commit(name: str):
+    # Only once the insert/rename is committed, so a rolled back transaction leaves no phantom name
+    frappe.db.after_commit.add(lambda: frappe.cache().sadd(CUSTOMER_NAMES_KEY, name.lower()))
+
+
+def add_customer_name_to_cache(doc, method=None):
+    _add_customer_name_after_commit(doc.name)
+
+
+def remove_customer_name_from_cache(doc, method=None):
+    frappe.cache().srem(CUSTOMER_NAMES_KEY, doc.name.lower())
+
+
+def rename_customer_name_in_cache(doc, method=None, old=None, new=None, merge=False):
+    if old:
+        frappe.cache().srem(CUSTOMER_NAMES_KEY, old.lower())
+    _add_customer_name_after_commit(new or doc.name)
 
 
 def _get_available_name(base_name: str) -> str:
     """Return a unique customer name by appending (2), (3), ... if needed.
-    Optimized to compute next suffix using a single SQL query instead of looping.
+    Fetches the existing "base_name (N)" names with one left-anchored LIKE (an index
+    range scan on name) and picks the next suffix in Python.
     """
-    # Quick path: if exact base doesn't exist, use it
-    if not frappe.db.exists("Customer", base_name):
+    # Quick path: the exact base name is free
+    if not _customer_name_taken(base_name):
         return base_name
 
-    # Compute maximum numeric suffix for names matching: base_name (N)
-    # Example: for base_name = 'john', match 'john (2)', 'john (3)', ...
-    # Extract N using SUBSTRING/LOCATE and cast to UNSIGNED, then take MAX
-    like_pattern = f"{base_name} (%"
-    sql = f"""
-        SELECT COALESCE(MAX(CAST(
-            SUBSTRING(
-                name,
-                LOCATE('(', name) + 1,
-                LOCATE(')', name) - LOCATE('(', name) - 1
-            ) AS UNSIGNED
-        )), 1) AS max_suffix
-        FROM `tabCustomer`
-        WHERE name LIKE %s AND name REGEXP %s
-    """
-    # REGEXP to ensure we only consider names like: base_name (number)
-    regexp_pattern = f"^{frappe.db.escape_string(base_name).decode() if hasattr(frappe.db, 'escape_string') else base_name} \\([0-9]+\\)$"
-    try:
-        res = frappe.db.sql(sql, (like_pattern, regexp_pattern))
-        max_suffix = res[0][0] if res and res[0] and res[0][0] else 1
-        next_suffix = int(max_suffix) + 1
-    except Exception:
-        # Fallback to iterative approach if SQL fails for any reason
-        next_suffix = 2
-        while frappe.db.exists("Customer", f"{base_name} ({next_suffix})"):
-            next_suffix += 1
+    # Candidates: names starting with "base_name (" -- LIKE wildcards in base_name are escaped
+    like_pattern = "{} (%".format(
+        base_name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+    names = frappe.db.sql_list("SELECT name FROM `tabCustomer` WHERE name LIKE %s", (like_pattern,))
+
+    # Only consider names exactly like: base_name (number)
+    suffix_re = re.compile(r"^" + re.escape(base_name) + r" \((\d+)\)$")
+    suffixes = [int(m.group(1)) for m in map(suffix_re.match, names) if m]
+    next_suffix = max(suffixes, default=1) + 1
 
     return f"{base_name} ({next_suffix})"
 
@@ -47,7 +85,6 @@ def create_customer(customer_name, company, customer_group=None, territory=None,
     Optional: mobile_no, email_id (validated if provided).
     If auto_suffix_duplicate=True, will create as "Name (2)", "Name (3)", ... on conflicts.
     """
-    import re
     # Hardcoded defaults
     customer_group = customer_group or "Individual"
     territory = territory or "All Territories"
@@ -58,21 +95,20 @@ def create_customer(customer_name, company, customer_group=None, territory=None,
         return {"error": "Missing required fields"}
     if mobile_no:
         mobile = str(mobile_no)
-        if not mobile.isdigit() or not (7 <= len(mobile) <= 15):
+        if not _MOBILE_RE.fullmatch(mobile):
             return {"error": "Invalid mobile_no. It should be 7-15 digits."}
     if email_id:
         email = str(email_id)
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+        if not _EMAIL_RE.match(email):
             return {"error": "Invalid email_id format."}
 
     try:
-        # Ensure unique name if requested
+        # Ensure unique name if requested (_get_available_name returns the name itself when free)
         target_name = customer_name
-        if frappe.db.exists("Customer", target_name):
-            if auto_suffix_duplicate:
-                target_name = _get_available_name(target_name)
-            else:
-                return {"error": _("Customer '{0}' already exists").format(customer_name)}
+        if auto_suffix_duplicate:
+            target_name = _get_available_name(customer_name)
+        elif frappe.db.exists("Customer", customer_name):
+            return {"error": _("Customer '{0}' already exists").format(customer_name)}
 
         doc_fields = {
             "doctype": "Customer",
@@ -105,17 +141,16 @@ def edit_customer(customer_name, **fields):
     Common fields: mobile_no, email_id, customer_name, plus any DocType field.
     Supports auto_suffix_duplicate when renaming.
     """
-    import re
     if not customer_name:
         return {"error": "customer_name required"}
     # Validation for common fields
     if "mobile_no" in fields:
         mobile = str(fields["mobile_no"])
-        if not mobile.isdigit() or not (7 <= len(mobile) <= 15):
+        if not _MOBILE_RE.fullmatch(mobile):
             return {"error": "Invalid mobile_no. It should be 7-15 digits."}
     if "email_id" in fields:
         email = str(fields["email_id"])
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+        if not _EMAIL_RE.match(email):
             return {"error": "Invalid email_id format."}
 
     try:
@@ -125,19 +160,14 @@ def edit_customer(customer_name, **fields):
         # Map incoming 'company' to the new link field
         if "company" in fields and "gol_customer_company" not in fields:
             fields["gol_customer_company"] = fields.pop("company")
-        for k, v in fields.items():
-            if hasattr(doc, k):
-                setattr(doc, k, v)
-            else:
-                doc.set(k, v)
+        doc.update(fields)
         doc.save(ignore_permissions=True)
         if new_name:
             target = new_name
-            if frappe.db.exists("Customer", target):
-                if auto_suffix_duplicate:
-                    target = _get_available_name(target)
-                else:
-                    return {"error": _("Customer '{0}' already exists").format(new_name)}
+            if auto_suffix_duplicate:
+                target = _get_available_name(new_name)
+            elif frappe.db.exists("Customer", new_name):
+                return {"error": _("Customer '{0}' already exists").format(new_name)}
             frappe.rename_doc("Customer", doc.name, target)
             doc = frappe.get_doc("Customer", target)  # reload doc after rename
         frappe.db.commit()
@@ -159,14 +189,29 @@ def delete_customer(customer_name):
         frappe.db.rollback()
         return {"error": str(e)}
 
+def _encode_customer_cursor(row) -> str:
+    """Opaque cursor pointing just past row in (modified desc, name desc) order."""
+    payload = json.dumps({"modified": str(row["modified"]), "name": row["name"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_customer_cursor(cursor: str) -> dict:
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+
+
 @frappe.whitelist(allow_guest=False)
-def get_customers(page: int = 1, page_size: int = 20, search: str | None = None, company: str | None = None, order_by: str = "modified desc"):
+def get_customers(page: int = 1, page_size: int = 20, search: str | None = None, company: str | None = None, order_by: str = "modified desc", cursor: str | None = None, include_total: bool = False, search_mode: str = "substring"):
     """Return customers in a paginated way with optional search and company filter.
     - page: 1-based page number
     - page_size: items per page (max 200 recommended)
     - search: matches against name and customer_name (LIKE)
+    - search_mode: "substring" (default, '%term%', full scan) or "prefix" ('term%', index range
+      seek on name / customer_name)
     - company: filter by company if provided
     - order_by: SQL order by (safe columns)
+    - cursor: next_cursor from the previous response; seeks on (modified, name) instead of
+      using OFFSET and always orders by modified desc, name desc (page/order_by are ignored)
+    - include_total: also run a COUNT(*) and return total (omitted by default)
     """
     page = int(page or 1)
     page_size = int(page_size or 20)
@@ -178,19 +223,36 @@ def get_customers(page: int = 1, page_size: int = 20, search: str | None = None,
     # Build raw SQL to avoid framework adding permission conditions that refer to a non-existent 'company' column
     conditions = []
     params = []
+    count_filters = {}
     if company:
         # Filter by gol_customer_company when provided
-        meta = frappe.get_meta("Customer")
-        if meta.has_field("gol_customer_company"):
+        if has_field("Customer", "gol_customer_company"):
             conditions.append("gol_customer_company = %s")
             params.append(company)
+            count_filters["gol_customer_company"] = company
     if search:
         conditions.append("(name like %s or customer_name like %s)")
-        like = f"%{search}%"
+        like = f"{search}%" if search_mode == "prefix" else f"%{search}%"
         params.extend([like, like])
 
     where_sql = f" where {' and '.join(conditions)}" if conditions else ""
     start = (page - 1) * page_size
+    # total counts the whole filtered set, not what is left after the cursor
+    count_where_sql, count_params = where_sql, list(params)
+
+    # Cursor mode: index range seek on (modified, name), no OFFSET
+    seek_sql = ""
+    seek_params = []
+    if cursor:
+        try:
+            after = _decode_customer_cursor(cursor)
+            after_modified, after_name = after["modified"], after["name"]
+            if not isinstance(after_modified, str) or not isinstance(after_name, str):
+                raise ValueError("cursor fields must be strings")
+        except Exception:
+            return {"error": "Invalid cursor"}
+        seek_sql = f"{' and' if conditions else ' where'} (modified < %s or (modified = %s and name < %s))"
+        seek_params = [after_modified, after_modified, after_name]
 
     # very small whitelist for order_by to prevent SQL injection
     allowed_order_fields = {"modified", "name", "customer_name"}
@@ -202,49 +264,76 @@ def get_customers(page: int = 1, page_size: int = 20, search: str | None = None,
             order_clause = f" order by {ob_field} {ob_dir}"
     except Exception:
         order_clause = " order by modified desc"
+    # Tie-break on name so modified-ordered pages line up with cursor pages
+    seekable = order_clause == " order by modified desc"
+    if seekable:
+        order_clause += ", name desc"
 
-    total = frappe.db.sql(f"select count(*) from `tabCustomer`{where_sql}", params)[0][0]
+    if cursor:
+        where_sql += seek_sql
+        params = params + seek_params
+        order_clause = " order by modified desc, name desc"
+        start = 0
+
+    # Fetch one extra row to know whether another page exists, without a COUNT(*)
     rows = frappe.db.sql(
         f"""
-        select name, customer_name, mobile_no, email_id, gol_customer_company, customer_group,
+        select name, customer_name, mobile_no, email_id, gol_customer_company as company, customer_group,
                territory, default_price_list, default_currency, modified
         from `tabCustomer`
         {where_sql}
         {order_clause}
         limit %s offset %s
         """,
-        params + [page_size, start],
+        params + [page_size + 1, start],
         as_dict=True,
     )
-    items = rows
+    has_next = len(rows) > page_size
+    items = rows[:page_size]
 
-    # Rename gol_customer_company -> company in response for consumers
-    for it in items:
-        if "gol_customer_company" in it:
-            it["company"] = it.pop("gol_customer_company")
+    next_cursor = _encode_customer_cursor(items[-1]) if items and has_next and (cursor or seekable) else None
 
-    has_next = (start + len(items)) < total
     next_page = page + 1 if has_next else None
 
-    return {
+    response = {
         "items": items,
         "page": page,
         "page_size": page_size,
-        "total": total,
         "has_next": has_next,
         "next_page": next_page,
+        "next_cursor": next_cursor,
     }
+    if include_total:
+        if search:
+            # OR of two LIKEs cannot be expressed as a filters dict
+            response["total"] = frappe.db.sql(f"select count(*) from `tabCustomer`{count_where_sql}", count_params)[0][0]
+        else:
+            response["total"] = frappe.db.count("Customer", filters=count_filters or None)
+    return response
 
 @frappe.whitelist(allow_guest=False)
 def sync_customer_transaction(**kwargs):
     """
     Unified endpoint for customer operations: create, edit, delete.
     Usage: type='create', 'edit', or 'delete' and pass required fields for each.
+    Pass idempotency_key to make retries safe: a repeated key replays the first
+    successful response (for 10 minutes) instead of running the operation again.
     """
     data = frappe._dict(kwargs)
     if not data.get("type"):
         frappe.throw("Missing 'type' in request. Must be one of: create, edit, delete")
 
+    idempotency_key = data.pop("idempotency_key", None)
+    cached = get_idempotent_response(idempotency_key)
+    if cached is not None:
+        return cached
+
+    result = _run_customer_transaction(data)
+    set_idempotent_response(idempotency_key, result)
+    return result
+
+
+def _run_customer_transaction(data):
     if data.type == "create":
         return create_customer(
             customer_name=data.get("customer_name"),
@@ -275,8 +364,11 @@ def sync_customer_transaction(**kwargs):
             page=data.get("page", 1),
             page_size=data.get("page_size", 20),
             search=data.get("search"),
+            search_mode=data.get("search_mode", "substring"),
             company=data.get("company"),
             order_by=data.get("order_by", "modified desc"),
+            cursor=data.get("cursor"),
+            include_total=cint(data.get("include_total")),
         )
     else:
         frappe.throw(f"Unknown customer transaction type: {data.type}")
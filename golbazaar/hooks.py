@@ -91,6 +91,7 @@ app_license = "mit"
 
 # before_install = "golbazaar.install.before_install"
 # after_install = "golbazaar.install.after_install"
+after_install = "golbazaar.install.create_database_indexes"
 
 # Uninstallation
 # ------------
@@ -152,6 +153,50 @@ override_doctype_class = {
 # 	}
 # }
 
+doc_events = {
+	"POS Profile": {
+		"on_update": "golbazaar.api.clear_pos_profile_cache",
+		"on_trash": "golbazaar.api.clear_pos_profile_cache",
+	},
+	"Item Tax Template": {
+		"on_update": "golbazaar.api.clear_tax_template_cache",
+		"on_trash": "golbazaar.api.clear_tax_template_cache",
+	},
+	"Mode of Payment": {
+		"on_update": "golbazaar.pos_invoice.clear_mode_of_payment_account_cache",
+		"on_trash": "golbazaar.pos_invoice.clear_mode_of_payment_account_cache",
+	},
+	"Item": {
+		"after_insert": "golbazaar.pos_item_cache.clear_pos_item_statistics_cache",
+		"on_update": "golbazaar.pos_item_cache.clear_pos_item_statistics_cache",
+		"on_trash": "golbazaar.pos_item_cache.clear_pos_item_statistics_cache",
+	},
+	"Stock Settings": {
+		"on_update": "golbazaar.pos_item_cache.clear_pos_single_value_cache",
+	},
+	"Selling Settings": {
+		"on_update": "golbazaar.pos_item_cache.clear_pos_single_value_cache",
+	},
+	"Global Defaults": {
+		"on_update": "golbazaar.pos_item_cache.clear_pos_single_value_cache",
+	},
+	"Customer": {
+		"after_insert": "golbazaar.customer.add_customer_name_to_cache",
+		"on_trash": "golbazaar.customer.remove_customer_name_from_cache",
+		"after_rename": "golbazaar.customer.rename_customer_name_in_cache",
+	},
+	"Company": {
+		"after_insert": "golbazaar.pos_item_cache.clear_valid_names_cache",
+		"on_trash": "golbazaar.pos_item_cache.clear_valid_names_cache",
+		"after_rename": "golbazaar.pos_item_cache.clear_valid_names_cache",
+	},
+	"Warehouse": {
+		"after_insert": "golbazaar.pos_item_cache.clear_valid_names_cache",
+		"on_trash": "golbazaar.pos_item_cache.clear_valid_names_cache",
+		"after_rename": "golbazaar.pos_item_cache.clear_valid_names_cache",
+	},
+}
+
 # Scheduled Tasks
 # ---------------
 
@@ -1,5 +1,7 @@
 import frappe
 
+from golbazaar.pos_item_cache import ITEM_FTS_INDEX_CACHE_KEY
+
 
 def after_install():
     """After installing golbazaar, hide unrelated Workspaces by default.
@@ -48,20 +50,117 @@ def after_install():
         # Some versions may not have module or may error; ignore
         pass
 
-    # Apply visibility
-    all_ws = frappe.get_all("Workspace", pluck="name")
-    for name in all_ws:
-        try:
-            is_keep = name in keep
-            # Set public/is_published accordingly
-            if frappe.db.has_column("Workspace", "public"):
-                frappe.db.set_value("Workspace", name, "public", 1 if is_keep else 0)
-            elif frappe.db.has_column("Workspace", "is_published"):
-                frappe.db.set_value("Workspace", name, "is_published", 1 if is_keep else 0)
-        except Exception:
-            continue
+    # Apply visibility via public/is_published, whichever this version has (checked once)
+    if frappe.db.has_column("Workspace", "public"):
+        visibility_column = "public"
+    elif frappe.db.has_column("Workspace", "is_published"):
+        visibility_column = "is_published"
+    else:
+        visibility_column = None
+
+    if visibility_column:
+        # One UPDATE per state instead of one per workspace
+        keep_names = tuple(keep) or ("",)
+        frappe.db.sql(
+            f"UPDATE `tabWorkspace` SET `{visibility_column}` = 1 WHERE name IN %(keep)s",
+            {"keep": keep_names},
+        )
+        frappe.db.sql(
+            f"UPDATE `tabWorkspace` SET `{visibility_column}` = 0 WHERE name NOT IN %(keep)s",
+            {"keep": keep_names},
+        )
 
     try:
         frappe.clear_cache(doctype="Workspace")
     except Exception:
         frappe.clear_cache()
+
+
+def create_database_indexes():
+    """after_install hook: create the indexes that patches add on existing sites.
+
+    Patches are marked as completed on a fresh install without running, so their DDL is repeated here.
+    """
+    create_item_search_indexes()
+    create_open_shift_unique_index()
+    create_modified_name_indexes()
+    create_pos_item_indexes()
+    create_customer_name_index()
+
+
+def create_modified_name_indexes():
+    """Support keyset pagination on (modified, name) in golbazaar.api.get_items / golbazaar.customer.get_customers."""
+    frappe.db.add_index("Item", ["modified", "name"], "idx_item_modified_name")
+    frappe.db.add_index("Customer", ["modified", "name"], "idx_customer_modified_name")
+
+
+def create_pos_item_indexes():
+    """Indexes for the POS item listings in golbazaar.api.items."""
+    # Covers the (is_sales_item, disabled) filter + item_name sort of the POS item listings
+    frappe.db.add_index("Item", ["is_sales_item", "disabled", "item_name"], "idx_item_pos")
+    # search_by_customer_code looks items up by ref_code
+    frappe.db.add_index("Item Customer Detail", ["ref_code"], "idx_item_customer_ref_code")
+
+
+def create_customer_name_index():
+    """Lets prefix searches in golbazaar.customer.get_customers (search_mode="prefix") seek on customer_name."""
+    frappe.db.add_index("Customer", ["customer_name"], "idx_customer_customer_name")
+
+
+def create_item_search_indexes():
+    """Index-backed text search for the POS item search paths (see golbazaar.api.items.apply_item_text_search)."""
+    if frappe.db.db_type == "mariadb":
+        if not frappe.db.has_index("tabItem", "idx_item_fts"):
+            frappe.db.sql_ddl(
+                "ALTER TABLE `tabItem` ADD FULLTEXT INDEX idx_item_fts (item_name, item_code, description)"
+            )
+        frappe.cache().delete_value(ITEM_FTS_INDEX_CACHE_KEY)
+    elif frappe.db.db_type == "postgres":
+        frappe.db.sql_ddl("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in ("item_name", "item_code", "description"):
+            frappe.db.sql_ddl(
+                f'CREATE INDEX IF NOT EXISTS item_{column}_trgm ON "tabItem" USING gin ({column} gin_trgm_ops)'
+            )
+
+
+def create_open_shift_unique_index():
+    """At most one Open POS Opening Entry per (user, pos_profile), backing golbazaar.shift.open_shift.
+
+    Skipped while legacy duplicates are still open; open_shift re-checks before inserting either way.
+    """
+    if frappe.db.db_type == "postgres":
+        duplicate_query = """
+            SELECT "user", pos_profile FROM "tabPOS Opening Entry"
+            WHERE status = 'Open'
+            GROUP BY "user", pos_profile
+            HAVING COUNT(*) > 1
+            LIMIT 1
+        """
+    else:
+        duplicate_query = """
+            SELECT user, pos_profile FROM `tabPOS Opening Entry`
+            WHERE status = 'Open'
+            GROUP BY user, pos_profile
+            HAVING COUNT(*) > 1
+            LIMIT 1
+        """
+    if frappe.db.sql(duplicate_query):
+        frappe.log_error("Duplicate open POS Opening Entries; uniq_open_shift not created", "golbazaar install")
+        return
+
+    if frappe.db.db_type == "mariadb":
+        # MariaDB has no partial indexes: index a generated column that is NULL unless Open
+        if not frappe.db.has_column("POS Opening Entry", "gol_open_shift_key"):
+            frappe.db.sql_ddl(
+                """ALTER TABLE `tabPOS Opening Entry` ADD COLUMN gol_open_shift_key varchar(281)
+                AS (IF(status = 'Open', CONCAT(user, '|', pos_profile), NULL)) PERSISTENT"""
+            )
+        if not frappe.db.has_index("tabPOS Opening Entry", "uniq_open_shift"):
+            frappe.db.sql_ddl(
+                "ALTER TABLE `tabPOS Opening Entry` ADD UNIQUE INDEX uniq_open_shift (gol_open_shift_key)"
+            )
+    elif frappe.db.db_type == "postgres":
+        frappe.db.sql_ddl(
+            """CREATE UNIQUE INDEX IF NOT EXISTS uniq_open_shift ON "tabPOS Opening Entry" ("user", pos_profile)
+            WHERE status = 'Open'"""
+        )
@@ -0,0 +1,6 @@
+from golbazaar.install import create_customer_name_index
+
+
+def execute():
+	# Lets prefix searches in customer.get_customers (search_mode="prefix") seek on customer_name
+	create_customer_name_index()
@@ -0,0 +1,6 @@
+from golbazaar.install import create_item_search_indexes
+
+
+def execute():
+	# Index-backed text search for the POS item search paths (see apply_item_text_search)
+	create_item_search_indexes()
@@ -0,0 +1,6 @@
+from golbazaar.install import create_modified_name_indexes
+
+
+def execute():
+	# Supports keyset pagination on (modified, name) in get_items / get_customers
+	create_modified_name_indexes()
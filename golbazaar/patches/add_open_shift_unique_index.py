@@ -0,0 +1,6 @@
+from golbazaar.install import create_open_shift_unique_index
+
+
+def execute():
+	# At most one Open POS Opening Entry per (user, pos_profile); see open_shift
+	create_open_shift_unique_index()
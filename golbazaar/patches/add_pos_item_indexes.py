@@ -0,0 +1,6 @@
+from golbazaar.install import create_pos_item_indexes
+
+
+def execute():
+	# Covers the POS item listing filters/sort and the customer code lookup
+	create_pos_item_indexes()
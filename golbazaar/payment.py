@@ -1,5 +1,7 @@
 import frappe
 
+from golbazaar.utils import has_field
+
 
 @frappe.whitelist(allow_guest=False)
 def get_payment_methods(company: str | None = None, only_enabled: bool = True):
@@ -10,9 +12,28 @@ def get_payment_methods(company: str | None = None, only_enabled: bool = True):
     - only_enabled: if True, filter by enabled/disabled field when available
     """
     try:
-        mop_meta = frappe.get_meta("Mode of Payment")
-        has_enabled = any(df.fieldname == "enabled" for df in mop_meta.fields)
-        has_disabled = any(df.fieldname == "disabled" for df in mop_meta.fields)
+        has_enabled = has_field("Mode of Payment", "enabled")
+        has_disabled = has_field("Mode of Payment", "disabled")
+
+        if company:
+            # Only methods having an account row for the given company; driven from the
+            # (far smaller) company-filtered account rows and joined back for the enabled flag
+            enabled_sql = ""
+            if only_enabled:
+                if has_enabled:
+                    enabled_sql = " AND mop.enabled = 1"
+                elif has_disabled:
+                    enabled_sql = " AND mop.disabled = 0"
+            return frappe.db.sql_list(
+                f"""
+                SELECT DISTINCT mop.name
+                FROM `tabMode of Payment Account` mpa
+                JOIN `tabMode of Payment` mop ON mop.name = mpa.parent
+                WHERE mpa.company = %s{enabled_sql}
+                ORDER BY mop.name ASC
+                """,
+                (company,),
+            )
 
         filters = []
         if only_enabled:
@@ -30,19 +51,6 @@ def get_payment_methods(company: str | None = None, only_enabled: bool = True):
             as_list=False,
         )
 
-        if company:
-            # Filter methods to those having an account row for the given company
-            allowed_names = set(
-                r.parent
-                for r in frappe.db.get_all(
-                    "Mode of Payment Account",
-                    filters={"company": company},
-                    fields=["parent"],
-                    as_list=False,
-                )
-            )
-            methods = [m for m in methods if m.get("name") in allowed_names]
-
         # Return array of names only
         result = [m.get("name") for m in methods if m.get("name")]
         return result
@@ -61,9 +69,8 @@ def get_payment_gateways(only_enabled: bool = True):
         if not frappe.db.exists("DocType", "Payment Gateway"):
             return []
 
-        pg_meta = frappe.get_meta("Payment Gateway")
-        has_enabled = any(df.fieldname == "enabled" for df in pg_meta.fields)
-        has_disabled = any(df.fieldname == "disabled" for df in pg_meta.fields)
+        has_enabled = has_field("Payment Gateway", "enabled")
+        has_disabled = has_field("Payment Gateway", "disabled")
 
         filters = []
         if only_enabled:
@@ -1,8 +1,13 @@
 # File: gol_app/api/pos_sync.py
 
+from collections import namedtuple
+
 import frappe
 from frappe import _
-from frappe.utils import now_datetime, flt
+from frappe.utils import now_datetime, flt, cint
+from frappe.utils.caching import request_cache
+
+from golbazaar.utils import get_idempotent_response, has_field, set_idempotent_response
 
 
 @frappe.whitelist(allow_guest=False)
@@ -10,6 +15,9 @@ def sync_pos_transaction(**kwargs):
     """
     Unified endpoint for POS sale and refund operations.
 
+    Pass idempotency_key to make client retries safe: a repeated key replays the
+    first successful response (for 10 minutes) instead of creating documents again.
+
     Handles:
     - Normal POS Invoice creation (sale)
     - Full refund (is_return=1, full items)
@@ -60,28 +68,131 @@ def sync_pos_transaction(**kwargs):
     if not data.get("type"):
         frappe.throw("Missing 'type' in request. Must be one of: sale, refund, exchange")
 
+    # 🔁 Replay retried requests
+    idempotency_key = data.pop("idempotency_key", None)
+    cached = get_idempotent_response(idempotency_key)
+    if cached is not None:
+        return cached
+
     frappe.logger("pos_sync").info(f"POS sync request by {user}: {data}")
 
     if data.type == "sale":
-        return create_pos_sale(data)
+        result = create_pos_sale(data)
 
     elif data.type == "refund":
-        return create_pos_refund(data)
+        result = create_pos_refund(data)
 
     elif data.type == "exchange":
-        return create_pos_exchange(data)
+        result = create_pos_exchange(data)
 
     elif data.type == "gateway_refund":
-        return log_gateway_refund(data)
+        result = log_gateway_refund(data)
 
     else:
         frappe.throw(f"Unknown transaction type: {data.type}")
 
+    set_idempotent_response(idempotency_key, result)
+    return result
+
+
+# Optional invoice-level fields copied from a sale payload, with their converters
+POS_SALE_OPTIONAL_FIELDS = (
+    ("additional_discount_percentage", float),
+    ("discount_amount", float),  # Invoice-level
+    ("rounded_total", float),
+    ("net_total", float),
+    ("base_net_total", float),
+)
+
+# Tax row added to a POS sale for an Item Tax Template tax_type
+TaxInfo = namedtuple("TaxInfo", "rate account_head description")
+
+
+@request_cache
+def _get_tax_template_details(template_name):
+    """Return [(tax_type, tax_rate), ...] of an Item Tax Template in idx order.
+
+    Cached in Redis across requests (cleared by golbazaar.api.clear_tax_template_cache)
+    and memoized for the current request on top of that.
+    """
+    return frappe.cache().hget(
+        "golbazaar_item_tax_template_details",
+        template_name,
+        generator=lambda: [
+            (d.tax_type, d.tax_rate)
+            for d in frappe.get_all(
+                "Item Tax Template Detail",
+                filters={"parent": template_name},
+                fields=["tax_type", "tax_rate"],
+                order_by="idx"
+            )
+        ],
+    )
+
+
+@request_cache
+def _get_mode_of_payment_account(mode_of_payment, company):
+    """Default account of a Mode of Payment for a company, cached in Redis across requests."""
+    def generator():
+        from erpnext.accounts.doctype.sales_invoice.sales_invoice import get_bank_cash_account
+        acc = get_bank_cash_account(mode_of_payment, company)
+        return acc.get("account") if acc else None
+
+    return frappe.cache().hget("golbazaar_mop_account", f"{mode_of_payment}|{company}", generator=generator)
+
+
+def clear_mode_of_payment_account_cache(doc, method=None):
+    """doc_events hook: drop cached Mode of Payment accounts when a Mode of Payment changes."""
+    frappe.cache().delete_value("golbazaar_mop_account")
+
+
+def _get_sale_totals(doc):
+    """Return (invoice_total, payment_total) of a POS Invoice; rounded_total wins over grand_total."""
+    invoice_total = flt(doc.rounded_total) or flt(doc.grand_total) or 0
+    payment_total = sum(flt(p.amount) for p in doc.payments)
+    return invoice_total, payment_total
+
 
 # ---------------------------------------------------------------------
 # 🧾 1. POS Sale
 # ---------------------------------------------------------------------
 def create_pos_sale(data):
+    doc = _insert_pos_sale(data)
+
+    # Profiles with gol_enable_async_submit answer once the invoice is saved and submit
+    # it from a background job; clients poll the invoice by name for the final status.
+    if has_field("POS Profile", "gol_enable_async_submit") and frappe.db.get_value(
+        "POS Profile", doc.pos_profile, "gol_enable_async_submit"
+    ):
+        frappe.enqueue(
+            "golbazaar.pos_invoice._submit_pos_sale",
+            queue="short",
+            enqueue_after_commit=True,
+            name=doc.name,
+        )
+        return {"message": "POS Sale queued for submission", "name": doc.name, "status": doc.status}
+
+    doc.submit()
+
+    return {"message": "POS Sale created", "name": doc.name, "status": doc.status}
+
+
+def _submit_pos_sale(name):
+    """Background job: submit a POS Invoice saved by create_pos_sale; failures are left as a comment on it."""
+    doc = frappe.get_doc("POS Invoice", name)
+    if doc.docstatus != 0:
+        return
+    try:
+        doc.submit()
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), "POS Sale Submit Error")
+        doc.add_comment("Comment", text=f"Background submit failed: {e}")
+        frappe.db.commit()
+
+
+def _insert_pos_sale(data):
+    """Create and save (not submit) the POS Invoice for a sale payload."""
     if not data.get("posting_date") or not data.get("posting_time"):
         frappe.throw("posting_date and posting_time are required for POS Sale")
     
@@ -89,38 +200,33 @@ def create_pos_sale(data):
     items = data.get("items") or []
     for item in items:
         # Compute effective rate locally to avoid ERPNext ignoring discount fields in some setups
-        if item.get("rate") is not None and (item.get("discount_amount") is not None or item.get("discount_percentage") is not None):
-            base_rate = flt(item.get("rate", 0))
-            if item.get("discount_amount") is not None:
-                effective_rate = base_rate - flt(item.get("discount_amount", 0))
-            elif item.get("discount_percentage") is not None:
-                pct = flt(item.get("discount_percentage", 0))
-                effective_rate = base_rate * (1.0 - pct / 100.0)
-            else:
-                effective_rate = base_rate
-
-            # Ensure non-negative and round to 2 decimals
-            item["rate"] = round(max(effective_rate, 0), 2)
-
-            # Remove discount fields to prevent double-discounting by ERPNext
-            item.pop("discount_amount", None)
-            item.pop("discount_percentage", None)
+        rate = item.get("rate")
+        discount_amount = item.get("discount_amount")
+        discount_percentage = item.get("discount_percentage")
+        if rate is None or (discount_amount is None and discount_percentage is None):
+            continue
+
+        if discount_amount is not None:
+            effective_rate = flt(rate) - flt(discount_amount)
+        else:
+            effective_rate = flt(rate) * (1.0 - flt(discount_percentage) / 100.0)
+
+        # Ensure non-negative and round to 2 decimals
+        item["rate"] = round(max(effective_rate, 0), 2)
+
+        # Remove discount fields to prevent double-discounting by ERPNext
+        item.pop("discount_amount", None)
+        item.pop("discount_percentage", None)
     
     # Ensure payment.account is set from Mode of Payment defaults (cache lookups)
     payments = data.get("payments") or []
-    account_cache = {}
     if payments:
         try:
-            from erpnext.accounts.doctype.sales_invoice.sales_invoice import get_bank_cash_account
             for row in payments:
                 if row and not row.get("account") and row.get("mode_of_payment"):
-                    mop = row.get("mode_of_payment")
-                    # Cache account lookups to avoid repeated calls
-                    if mop not in account_cache:
-                        acc = get_bank_cash_account(mop, data.company)
-                        account_cache[mop] = acc.get("account") if acc else None
-                    if account_cache[mop]:
-                        row["account"] = account_cache[mop]
+                    account = _get_mode_of_payment_account(row.get("mode_of_payment"), data.company)
+                    if account:
+                        row["account"] = account
         except Exception:
             pass
     
@@ -144,20 +250,14 @@ def create_pos_sale(data):
     if "included_in_print_rate" in data:
         doc_fields["included_in_print_rate"] = int(data.get("included_in_print_rate", 0))
     
-    optional_fields = {
-        "additional_discount_percentage": float,
-        "discount_amount": float,  # Invoice-level
-        "rounded_total": float,
-        "net_total": float,
-        "base_net_total": float,
-    }
-    
-    for field, converter in optional_fields.items():
-        if field in data and data[field] is not None:
-            try:
-                doc_fields[field] = converter(data[field])
-            except (ValueError, TypeError):
-                pass  # Skip invalid values
+    for field, converter in POS_SALE_OPTIONAL_FIELDS:
+        value = data.get(field)
+        if value is None:
+            continue
+        try:
+            doc_fields[field] = converter(value)
+        except (ValueError, TypeError):
+            pass  # Skip invalid values
     
     # Handle apply_discount_on with validation
     if data.get("apply_discount_on"):
@@ -168,135 +268,116 @@ def create_pos_sale(data):
     doc.insert(ignore_permissions=True)
     
     # Verify and fix item rates if discounts weren't applied correctly
-    # This can happen if ERPNext didn't calculate rates from price_list_rate - discount_amount
+    # This can happen if ERPNext didn't calculate rates from price_list_rate - discount_amount.
+    # insert() already calculated totals, so recalculate once at the end only if something changed.
+    needs_recalc = False
     for item in doc.items:
         if item.discount_amount and item.price_list_rate:
             expected_rate = item.price_list_rate - item.discount_amount
             # If rate doesn't match expected, fix it
             if abs(item.rate - expected_rate) > 0.01:
                 item.rate = expected_rate
+                needs_recalc = True
         elif item.discount_percentage and item.price_list_rate:
             expected_rate = item.price_list_rate * (1.0 - item.discount_percentage / 100.0)
             if abs(item.rate - expected_rate) > 0.01:
                 item.rate = expected_rate
-    
-    # Recalculate totals after fixing item rates
-    doc.calculate_taxes_and_totals()
+                needs_recalc = True
     
     # Ensure taxes are applied correctly based on included_in_print_rate and item_tax_template
     # If item_tax_template is provided, ensure taxes are set from the template
     has_item_tax_template = any(item.get("item_tax_template") for item in doc.items)
     if has_item_tax_template:
         # Collect unique tax types from all item tax templates
-        tax_map = {}  # tax_type -> {rate, account_head, description}
+        tax_map = {}  # tax_type -> TaxInfo
+        
+        # Look up each distinct template once; details come from the shared cache
+        templates = {item.item_tax_template for item in doc.items if item.item_tax_template}
+        details_by_parent = {template: _get_tax_template_details(template) for template in templates}
         
         for item in doc.items:
             if item.item_tax_template:
-                # Get tax details from Item Tax Template
-                tax_details = frappe.get_all(
-                    "Item Tax Template Detail",
-                    filters={"parent": item.item_tax_template},
-                    fields=["tax_type", "tax_rate"],
-                    order_by="idx"
-                )
-                
-                for tax_detail in tax_details:
-                    tax_type = tax_detail.tax_type  # tax_type is already the Account name
+                for tax_type, tax_rate in details_by_parent[item.item_tax_template]:
+                    # tax_type is already the Account name
                     if tax_type not in tax_map:
-                        tax_map[tax_type] = {
-                            "rate": tax_detail.tax_rate,
-                            "account_head": tax_type,  # tax_type is the account name
-                            "description": tax_type.split("-")[0].strip() if "-" in tax_type else tax_type
-                        }
+                        tax_map[tax_type] = TaxInfo(
+                            rate=tax_rate,
+                            account_head=tax_type,  # tax_type is the account name
+                            description=tax_type.split("-")[0].strip() if "-" in tax_type else tax_type
+                        )
         
         # Add taxes to document if they don't exist
         if tax_map:
             existing_tax_accounts = {tax.account_head for tax in doc.get("taxes") or []}
             
-            for tax_type, tax_data in tax_map.items():
-                if tax_data["account_head"] not in existing_tax_accounts:
+            for tax_info in tax_map.values():
+                if tax_info.account_head not in existing_tax_accounts:
                     doc.append("taxes", {
                         "charge_type": "On Net Total",
-                        "account_head": tax_data["account_head"],
-                        "rate": tax_data["rate"],
-                        "description": tax_data["description"],
+                        **tax_info._asdict(),
                         "included_in_print_rate": 1 if doc.included_in_print_rate else 0
                     })
-            
-            # Recalculate taxes after adding tax rows
-            doc.calculate_taxes_and_totals()
+                    needs_recalc = True
     
     # If tax is inclusive (included_in_print_rate = 1), ensure tax rows also have it set
-    # and net_rate is calculated correctly
+    # so ERPNext extracts the tax-exclusive amount (net_rate) from the tax-inclusive rate
     if doc.included_in_print_rate:
-        # Set included_in_print_rate on all tax rows to match document setting
         for tax in doc.get("taxes") or []:
             if not tax.get("included_in_print_rate"):
                 tax.included_in_print_rate = 1
-        
-        # Recalculate to ensure tax-inclusive pricing is handled correctly
-        # ERPNext extracts tax-exclusive amount (net_rate) from tax-inclusive amount (rate)
-        doc.calculate_taxes_and_totals()
+                needs_recalc = True
     
-    # Final recalculation to ensure everything is correct
-    doc.calculate_taxes_and_totals()
+    # Single recalculation after all item/tax mutations
+    if needs_recalc:
+        doc.calculate_taxes_and_totals()
     
     # Adjust payment total to match grand_total (after ALL taxes/discounts calculated)
     # This must happen after all tax calculations to ensure payment matches final total
-    invoice_total = flt(doc.rounded_total) or flt(doc.grand_total) or 0
-    payment_total = sum(flt(p.get("amount", 0)) for p in doc.payments)
+    invoice_total, payment_total = _get_sale_totals(doc)
+    payment_adjusted = abs(payment_total - invoice_total) > 0.01
     
-    if abs(payment_total - invoice_total) > 0.01:
+    if payment_adjusted:
         if doc.payments:
             # Adjust first payment to cover the difference
             difference = invoice_total - payment_total
             doc.payments[0].amount = flt(doc.payments[0].amount) + flt(difference)
-            
-            # Recalculate paid_amount from payments table
-            payment_total = sum(flt(p.get("amount", 0)) for p in doc.payments)
-            
-            # Set paid_amount to match invoice total exactly
-            doc.paid_amount = invoice_total
-            doc.outstanding_amount = 0
-            
-            # Set base amounts
-            base_invoice_total = flt(doc.base_rounded_total) or flt(doc.base_grand_total) or 0
-            doc.base_paid_amount = base_invoice_total
-            doc.base_outstanding_amount = 0
         else:
             frappe.throw("Payment amount mismatch: invoice_total={}, payment_total={}, grand_total={}, rounded_total={}".format(
                 invoice_total, payment_total, doc.grand_total, doc.rounded_total))
     
-    # Final check: ensure paid_amount matches exactly
-    if abs(doc.paid_amount - invoice_total) > 0.01:
-        doc.paid_amount = invoice_total
-        doc.outstanding_amount = 0
+    # Payments now cover the invoice total exactly
+    paid_fields = None
+    if payment_adjusted or abs(flt(doc.paid_amount) - invoice_total) > 0.01:
         base_invoice_total = flt(doc.base_rounded_total) or flt(doc.base_grand_total) or 0
-        doc.base_paid_amount = base_invoice_total
-        doc.base_outstanding_amount = 0
+        paid_fields = {
+            "paid_amount": invoice_total,
+            "outstanding_amount": 0,
+            "base_paid_amount": base_invoice_total,
+            "base_outstanding_amount": 0,
+        }
+        doc.update(paid_fields)
     
-    # Save before submit to ensure all changes (taxes, payments) are persisted
-    doc.save(ignore_permissions=True)
-    
-    # Reload to ensure all fields are in sync
-    doc.reload()
-    
-    # Final validation before submit
-    final_invoice_total = flt(doc.rounded_total) or flt(doc.grand_total) or 0
-    final_payment_total = sum(flt(p.get("amount", 0)) for p in doc.payments)
-    
-    if abs(final_payment_total - final_invoice_total) > 0.01:
-        # Last attempt: adjust payment one more time
-        if doc.payments:
-            diff = final_invoice_total - final_payment_total
-            doc.payments[0].amount = flt(doc.payments[0].amount) + flt(diff)
-            doc.paid_amount = final_invoice_total
-            doc.outstanding_amount = 0
-            doc.save(ignore_permissions=True)
-    
-    doc.submit()
-
-    return {"message": "POS Sale created", "name": doc.name, "status": doc.status}
+    if needs_recalc:
+        # Items or taxes changed: save everything before submit.
+        # No reload: save() leaves the in-memory doc identical to what it wrote.
+        doc.save(ignore_permissions=True)
+        
+        # save() recalculates from the same rows, so the adjusted payments still cover the total
+        final_invoice_total, final_payment_total = _get_sale_totals(doc)
+        if abs(final_payment_total - final_invoice_total) > 0.01:
+            frappe.throw("Payment amount mismatch after save: invoice_total={}, payment_total={}".format(
+                final_invoice_total, final_payment_total))
+    elif paid_fields:
+        # Only payment amounts moved: write those columns instead of re-saving every row.
+        # modified is left alone so the in-memory doc stays current for submit().
+        if payment_adjusted:
+            frappe.db.set_value(
+                "Sales Invoice Payment", doc.payments[0].name, "amount", doc.payments[0].amount,
+                update_modified=False
+            )
+        frappe.db.set_value("POS Invoice", doc.name, paid_fields, update_modified=False)
+
+    return doc
 
 
 # ---------------------------------------------------------------------
@@ -320,9 +401,15 @@ def create_pos_refund(data):
         "remarks": data.get("remarks")
     })
     # Patch: defensively set paid_amount and grand_total to prevent None error
-    payments = data.get("payments", [])
-    refund_doc.paid_amount = sum(row.get("amount", 0) for row in payments) if payments else 0
-    refund_doc.grand_total = abs(sum(item.get("qty", 0) * item.get("rate", 0) for item in data.get("items", [])))
+    # Single float pass over each list; flt() also accepts numeric strings from offline clients
+    paid = 0.0
+    for row in data.get("payments") or ():
+        paid += flt(row.get("amount"))
+    grand_total = 0.0
+    for item in data.get("items") or ():
+        grand_total += flt(item.get("qty")) * flt(item.get("rate"))
+    refund_doc.paid_amount = paid
+    refund_doc.grand_total = abs(grand_total)
     refund_doc.rounded_total = refund_doc.grand_total
     refund_doc.outstanding_amount = 0
     refund_doc.insert(ignore_permissions=True)
@@ -340,30 +427,40 @@ def create_pos_refund(data):
 # 🔄 3. POS Exchange (Return + New Sale)
 # ---------------------------------------------------------------------
 def create_pos_exchange(data):
+    """
+    Create the return and the new sale in the request's single transaction.
+    Both are atomic: if either fails, a savepoint rolls back the pair, and the
+    request commits once at the end (no intermediate commits).
+    """
     if not data.get("return_against"):
         frappe.throw("return_against required for exchange")
 
-    # Create return
-    return_doc = frappe.get_doc({
-        "doctype": "POS Invoice",
-        "is_return": 1,
-        "return_against": data.return_against,
-        "company": data.company,
-        "items": data.get("returned_items"),
-        "payments": [],
-        "update_stock": 1
-    }).insert(ignore_permissions=True)
-    return_doc.submit()
-
-    # Create new sale
-    new_sale = frappe.get_doc({
-        "doctype": "POS Invoice",
-        "company": data.company,
-        "items": data.get("new_items"),
-        "payments": data.get("payments"),
-        "is_pos": 1
-    }).insert(ignore_permissions=True)
-    new_sale.submit()
+    frappe.db.savepoint("pos_exchange")
+    try:
+        # Create return
+        return_doc = frappe.get_doc({
+            "doctype": "POS Invoice",
+            "is_return": 1,
+            "return_against": data.return_against,
+            "company": data.company,
+            "items": data.get("returned_items"),
+            "payments": [],
+            "update_stock": 1
+        }).insert(ignore_permissions=True)
+        return_doc.submit()
+
+        # Create new sale
+        new_sale = frappe.get_doc({
+            "doctype": "POS Invoice",
+            "company": data.company,
+            "items": data.get("new_items"),
+            "payments": data.get("payments"),
+            "is_pos": 1
+        }).insert(ignore_permissions=True)
+        new_sale.submit()
+    except Exception:
+        frappe.db.rollback(save_point="pos_exchange")
+        raise
 
     return {
         "message": "Exchange completed",
@@ -376,6 +473,15 @@ def create_pos_exchange(data):
 # 🧾 4. Gateway Refund Logging (no POS return)
 # ---------------------------------------------------------------------
 def log_gateway_refund(data):
+    """
+    Record a gateway refund as a Payment Entry.
+
+    By default the entry is inserted and submitted normally. With skip_hooks, the draft row is
+    written directly (no validation, doc_events or submit): one INSERT, but also no GL entries
+    or party balance update. Use it only when the gateway refund is an audit record that is
+    reconciled in accounts separately; it is restricted to Accounts Managers, since the row
+    bypasses mandatory and permission checks.
+    """
     if not data.get("reference_date"):
         frappe.throw("reference_date is required for gateway refund log")
     ref = frappe.new_doc("Payment Entry")
@@ -390,7 +496,13 @@ def log_gateway_refund(data):
         "reference_date": data.get("reference_date"),
         "company": data.company,
     })
-    ref.insert(ignore_permissions=True)
-    ref.submit()
+    if cint(data.get("skip_hooks")):
+        frappe.only_for("Accounts Manager")
+        ref.set_new_name()
+        ref.set_user_and_timestamp()
+        ref.db_insert()
+    else:
+        ref.insert(ignore_permissions=True)
+        ref.submit()
 
     return {"message": "Gateway refund logged", "name": ref.name}
@@ -3,20 +3,15 @@ Override POS Invoice validation to bypass permission checks when creating invoic
 """
 import frappe
 from erpnext.accounts.doctype.pos_invoice.pos_invoice import POSInvoice
+from frappe.utils.caching import request_cache
 
 
 class CustomPOSInvoice(POSInvoice):
     """Custom POS Invoice class that overrides validate_pos_opening_entry to bypass permissions"""
     
     def validate_pos_opening_entry(self):
-        """Override to use frappe.db.get_all with ignore_permissions=True"""
-        # Use db.get_all with ignore_permissions to bypass permission checks
-        opening_entries = frappe.db.get_all(
-            "POS Opening Entry",
-            filters={"pos_profile": self.pos_profile, "status": "Open", "docstatus": 1},
-            ignore_permissions=True
-        )
-        if len(opening_entries) == 0:
+        """Override to check for an open entry directly (no permission checks)"""
+        if not has_open_pos_opening_entry(self.pos_profile):
             frappe.throw(
                 title=frappe._("POS Opening Entry Missing"),
                 msg=frappe._("No open POS Opening Entry found for POS Profile {0}.").format(
@@ -24,3 +19,12 @@ class CustomPOSInvoice(POSInvoice):
                 ),
             )
 
+
+@request_cache
+def has_open_pos_opening_entry(pos_profile):
+    """Whether pos_profile has a submitted, open POS Opening Entry; memoized for the current request
+    since validate runs once per invoice when a sync posts many of them."""
+    return bool(frappe.db.exists(
+        "POS Opening Entry",
+        {"pos_profile": pos_profile, "status": "Open", "docstatus": 1}
+    ))
@@ -0,0 +1,52 @@
+"""Redis caches behind the POS item endpoints (golbazaar/api/items.py) and their doc_events hooks.
+
+Kept in a top-level module so hooks.py can reach them: golbazaar/api.py shadows the golbazaar/api/
+directory, so dotted paths under golbazaar.api.items are not importable.
+"""
+import frappe
+
+POS_ITEM_STATS_CACHE_KEY = "golbazaar:pos_item_stats"
+POS_SINGLES_CACHE_KEY = "golbazaar:pos_singles"
+ITEM_FTS_INDEX_CACHE_KEY = "golbazaar:has_item_fts_index"
+
+
+def clear_pos_item_statistics_cache(doc, method=None):
+    """Drop cached POS item statistics; hooked to Item doc_events."""
+    frappe.cache().delete_value(POS_ITEM_STATS_CACHE_KEY)
+
+
+def get_pos_single_value(doctype, fieldname):
+    """Read a settings value (Stock Settings, Selling Settings, Global Defaults) through redis."""
+    return frappe.cache().hget(
+        POS_SINGLES_CACHE_KEY,
+        f"{doctype}:{fieldname}",
+        generator=lambda: frappe.db.get_single_value(doctype, fieldname)
+    )
+
+
+def clear_pos_single_value_cache(doc, method=None):
+    """Drop cached settings values; hooked to the settings doctypes' on_update."""
+    frappe.cache().delete_value(POS_SINGLES_CACHE_KEY)
+
+
+def get_valid_names(doctype):
+    """Get the set of existing names of a rarely changing doctype (Company, Warehouse), cached for 5 minutes."""
+    cache_key = f"golbazaar:valid_names:{doctype}"
+    names = frappe.cache().get_value(cache_key)
+    if names is None:
+        names = set(frappe.get_all(doctype, pluck="name"))
+        frappe.cache().set_value(cache_key, names, expires_in_sec=300)
+    return names
+
+
+def clear_valid_names_cache(doc, method=None, *args):
+    """Drop the cached name set for doc's doctype; hooked to Company and Warehouse doc_events."""
+    frappe.cache().delete_value(f"golbazaar:valid_names:{doc.doctype}")
+
+
+def has_item_fulltext_index():
+    """Whether tabItem has the idx_item_fts FULLTEXT index (MariaDB); cached until the index is created."""
+    return frappe.cache().get_value(
+        ITEM_FTS_INDEX_CACHE_KEY,
+        generator=lambda: frappe.db.db_type == "mariadb" and bool(frappe.db.has_index("tabItem", "idx_item_fts")),
+    )
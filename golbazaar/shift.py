@@ -13,16 +13,13 @@ def open_shift(pos_profile, user, opening_amount, company, branch, system_shift_
     if not posting_date or not posting_time:
         return {"error": "posting_date and posting_time are required"}
     
-    # Retry logic for handling QueryDeadlockError during name generation
+    # Retry logic for handling QueryDeadlockError during name generation. Where the
+    # uniq_open_shift index exists it also rejects concurrent openings for the same user/profile.
     max_retries = 5
     for retry in range(max_retries):
         try:
             # Check for existing shift at the start of each retry attempt
-            existing = frappe.db.exists("POS Opening Entry", {
-                "user": user,
-                "pos_profile": pos_profile,
-                "status": "Open"
-            })
+            existing = _get_open_shift(user, pos_profile)
             if existing:
                 return {"error": "Shift already open", "shift_id": existing}
 
@@ -60,9 +57,20 @@ def open_shift(pos_profile, user, opening_amount, company, branch, system_shift_
                 raise
         except Exception as e:
             frappe.db.rollback()
+            # Lost the race to another opening for this user/profile: no point retrying
+            if isinstance(e, frappe.UniqueValidationError) or frappe.db.is_unique_key_violation(e):
+                return {"error": "Shift already open", "shift_id": _get_open_shift(user, pos_profile)}
             raise
 
 
+def _get_open_shift(user, pos_profile):
+    return frappe.db.exists("POS Opening Entry", {
+        "user": user,
+        "pos_profile": pos_profile,
+        "status": "Open"
+    })
+
+
 @frappe.whitelist()
 def get_active_shift(user, pos_profile):
     """Return active (open) shift for a user and profile"""
@@ -90,15 +98,27 @@ def sync_pos_invoices(shift_id, invoices_json):
     synced = []
     errors = []
 
+    # Check which invoices were already synced in one query instead of one per invoice
+    system_ids = [inv.get("system_invoice_id") for inv in invoices if inv.get("system_invoice_id")]
+    already_synced = set(frappe.get_all(
+        "POS Invoice",
+        filters={"custom_system_invoice_id": ["in", system_ids]},
+        pluck="custom_system_invoice_id"
+    )) if system_ids else set()
+
+    # Commit once per chunk; a savepoint per invoice keeps one failure from undoing the rest
+    chunk_size = 200
+    pending = 0
     for inv in invoices:
+        system_invoice_id = inv.get("system_invoice_id")
+        if system_invoice_id in already_synced:
+            synced.append(system_invoice_id)
+            continue
+        if not inv.get("posting_date") or not inv.get("posting_time"):
+            errors.append({"invoice": system_invoice_id, "error": "posting_date and posting_time are required"})
+            continue
+        frappe.db.savepoint("sync_pos_invoice")
         try:
-            # Check if already synced by custom_system_invoice_id
-            if frappe.db.exists("POS Invoice", {"custom_system_invoice_id": inv.get("system_invoice_id")}):
-                synced.append(inv.get("system_invoice_id"))
-                continue
-            if not inv.get("posting_date") or not inv.get("posting_time"):
-                errors.append({"invoice": inv.get("system_invoice_id"), "error": "posting_date and posting_time are required"})
-                continue
             doc = frappe.get_doc({
                 "doctype": "POS Invoice",
                 "company": inv["company"],
@@ -108,16 +128,25 @@ def sync_pos_invoices(shift_id, invoices_json):
                 "posting_time": inv["posting_time"],
                 "payments": inv.get("payments", []),
                 "items": inv.get("items", []),
-                "custom_system_invoice_id": inv.get("system_invoice_id"),
+                "custom_system_invoice_id": system_invoice_id,
                 "custom_system_shift_id": inv.get("system_shift_id"),
                 "docstatus": 1  # Submitted
             })
             doc.insert(ignore_permissions=True)
-            frappe.db.commit()
-            synced.append(doc.name)
         except Exception as e:
-            frappe.db.rollback()
-            errors.append({"invoice": inv.get("system_invoice_id"), "error": str(e)})
+            frappe.db.rollback(save_point="sync_pos_invoice")
+            errors.append({"invoice": system_invoice_id, "error": str(e)})
+            continue
+        if system_invoice_id:
+            already_synced.add(system_invoice_id)
+        synced.append(doc.name)
+        pending += 1
+        if pending >= chunk_size:
+            frappe.db.commit()
+            pending = 0
+
+    if pending:
+        frappe.db.commit()
 
     return {"synced": synced, "errors": errors}
 
@@ -0,0 +1,90 @@
+import frappe
+from frappe.utils import cint
+
+
+def has_field(doctype: str, fieldname: str) -> bool:
+    """Return True if doctype has fieldname (Custom Fields included).
+
+    frappe.get_meta is cached per site and invalidated when the doctype or its custom fields change.
+    """
+    return bool(frappe.get_meta(doctype).has_field(fieldname))
+
+
+def get_dashboard_data(expires_in_sec: int = 30) -> dict:
+    """User/DocType counts and the 10 latest Items for the dashboard pages, cached in redis as one entry.
+
+    The counts come from a single query; dashboard stats need not be real time.
+    """
+    key = "golbazaar:dashboard_data"
+    data = frappe.cache().get_value(key)
+    if data is None:
+        data = frappe.db.sql(
+            """
+            SELECT
+                (SELECT COUNT(*) FROM `tabUser`) AS total_users,
+                (SELECT COUNT(*) FROM `tabDocType`) AS total_doctypes
+            """,
+            as_dict=True,
+        )[0]
+        try:
+            data["items"] = frappe.get_list(
+                "Item",
+                fields=["name", "item_name", "item_group", "stock_uom", "disabled"],
+                order_by="modified desc",
+                limit_page_length=10,
+                ignore_permissions=True,
+            )
+        except Exception:
+            data["items"] = []
+        frappe.cache().set_value(key, data, expires_in_sec=expires_in_sec)
+    return data
+
+
+def get_paged_list(context, doctype: str, fields: list, search_field: str, max_page_length: int = 200) -> list:
+    """One page of doctype for the /golbazaar list pages, newest first.
+
+    Reads search, start and page_length from the query string, filters search_field with LIKE and
+    sets search/start/page_length/has_next on context for the search box and pager.
+    """
+    form = frappe.form_dict
+    search = (form.get("search") or "").strip()
+    start = max(cint(form.get("start")), 0)
+    page_length = min(max(cint(form.get("page_length")) or 50, 1), max_page_length)
+
+    # Fetch one extra row to know whether there is a next page without a COUNT(*)
+    rows = frappe.get_all(
+        doctype,
+        fields=fields,
+        filters={search_field: ["like", f"%{search}%"]} if search else None,
+        order_by="modified desc",
+        start=start,
+        page_length=page_length + 1,
+    )
+    context.update(search=search, start=start, page_length=page_length, has_next=len(rows) > page_length)
+    return rows[:page_length]
+
+
+def _idempotency_cache_key(idempotency_key: str) -> str:
+    return f"golbazaar:idempotency:{frappe.session.user}:{idempotency_key}"
+
+
+def get_idempotent_response(idempotency_key: str | None):
+    """Return the response recorded for a retried request with this client-supplied key, if any."""
+    if not idempotency_key:
+        return None
+    cached = frappe.cache().get_value(_idempotency_cache_key(idempotency_key))
+    return frappe.parse_json(cached) if cached else None
+
+
+def set_idempotent_response(idempotency_key: str | None, response, expires_in_sec: int = 600):
+    """Record a successful response so retries with the same key replay it instead of re-running.
+
+    Written only once the request's transaction commits, so a rolled back request is never replayed.
+    """
+    if not idempotency_key or (isinstance(response, dict) and response.get("error")):
+        return
+    cache_key = _idempotency_cache_key(idempotency_key)
+    payload = frappe.as_json(response)
+    frappe.db.after_commit.add(
+        lambda: frappe.cache().set_value(cache_key, payload, expires_in_sec=expires_in_sec)
+    )
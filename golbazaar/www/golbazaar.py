@@ -2,6 +2,24 @@
 from __future__ import unicode_literals
 import frappe
 
+FEATURES = (
+	{
+		"title": "Dashboard",
+		"description": "Monitor your business metrics and performance",
+		"icon": "📊"
+	},
+	{
+		"title": "Settings", 
+		"description": "Configure your Golbazaar application",
+		"icon": "📋"
+	},
+	{
+		"title": "Customization",
+		"description": "Customize the app according to your needs", 
+		"icon": "🔧"
+	}
+)
+
 def get_context(context):
 	context.title = "Golbazaar"
 	context.app_name = "golbazaar"
@@ -9,28 +27,6 @@ def get_context(context):
 	context.app_description = "Custom Golbazaar Business Application"
 	
 	# Add any data you want to pass to the template
-	context.features = [
-		{
-			"title": "Dashboard",
-			"description": "Monitor your business metrics and performance",
-			"icon": "📊"
-		},
-		{
-			"title": "Settings", 
-			"description": "Configure your Golbazaar application",
-			"icon": "📋"
-		},
-		{
-			"title": "Customization",
-			"description": "Customize the app according to your needs", 
-			"icon": "🔧"
-		}
-	]
+	context.features = FEATURES
 	
 	return context
-
-
-
-
-
-
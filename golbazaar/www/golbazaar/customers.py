@@ -1,12 +1,12 @@
-import frappe
+from golbazaar.utils import get_paged_list
 
 
 def get_context(context):
-	context.customers = frappe.get_all(
+	context.customers = get_paged_list(
+		context,
 		"Customer",
 		fields=["name", "customer_name", "customer_group", "territory", "modified"],
-		order_by="modified desc",
-		limit_page_length=50,
+		search_field="customer_name",
 	)
 	return context
 
@@ -1,12 +1,12 @@
-import frappe
+from golbazaar.utils import get_paged_list
 
 
 def get_context(context):
-	context.items = frappe.get_all(
+	context.items = get_paged_list(
+		context,
 		"Item",
 		fields=["name", "item_name", "item_group", "stock_uom", "disabled", "modified"],
-		order_by="modified desc",
-		limit_page_length=50,
+		search_field="item_name",
 	)
 	return context
 
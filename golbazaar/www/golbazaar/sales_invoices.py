@@ -1,12 +1,12 @@
-import frappe
+from golbazaar.utils import get_paged_list
 
 
 def get_context(context):
-	context.sales_invoices = frappe.get_all(
+	context.sales_invoices = get_paged_list(
+		context,
 		"Sales Invoice",
 		fields=["name", "customer", "posting_date", "grand_total", "status", "modified"],
-		order_by="modified desc",
-		limit_page_length=50,
+		search_field="customer",
 	)
 	return context
 
@@ -1,12 +1,12 @@
-import frappe
+from golbazaar.utils import get_paged_list
 
 
 def get_context(context):
-	context.suppliers = frappe.get_all(
+	context.suppliers = get_paged_list(
+		context,
 		"Supplier",
 		fields=["name", "supplier_name", "supplier_group", "modified"],
-		order_by="modified desc",
-		limit_page_length=50,
+		search_field="supplier_name",
 	)
 	return context
 